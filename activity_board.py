@@ -33,20 +33,37 @@ https://github.com/davidsmakerworks/activity-board
 """
 
 
+import json
 import random
+import re
 import time
+import zlib
 
+from collections import deque
 from enum import Enum, unique, auto
-from typing import Union, List
+from typing import Iterable, Union, List, Tuple
 
 import pygame
 
 # Wildcard import used here based on standard pygame code style
 from pygame.locals import *
 
+from activity_sampler import ActivityHistory, ActivitySampler
+from activity_views import ActivityViewCache
+from asset_cache import AssetCache
+from board_snapshot import BoardSnapshot
 from button import Button
 from door import Door, DoorProperties
+from file_watcher import FileWatcher
+from idle_scheduler import IdleScheduler
+from input_queue import AutoRepeat, InputQueue
+from layout import BoardLayout
+from memory_budget import SurfaceBudget, surface_bytes
+from prerender import DoorPrerenderer
 from text_renderer import TextRenderer
+from texture_display import TextureDisplay
+from transitions import (
+    DoorTransition, TRANSITION_EFFECTS, transitions_available)
 
 
 class ActivityBoard:
@@ -54,7 +71,8 @@ class ActivityBoard:
     Class representing the entire activity board.
 
     Properties:
-    surface -- the pygame surface where the board will be drawn
+    surface -- the pygame surface where the board will be drawn, or a
+        TextureDisplay to draw with GPU textures
     config -- dictionary representing the activity board configuration -
         almost all configuration is done through this object rather than by
         programmatically changing class properties
@@ -63,9 +81,30 @@ class ActivityBoard:
     surface_is_display -- determines whether the surface object is to be
         treated as a pygame display (i.e., calling pygame.display.update() when
         needed)
-
-    TODO: Clean up properties and methods related to door coordinates,
-        door sizes, etc.
+    assets -- AssetCache object used to load fonts and sounds - pass the same
+        object to several boards to share assets between them
+    joystick_id -- index of the joystick used to control this board
+    input_pump -- function that collects input into the queues of one or more
+        boards (optional - by default the board reads the pygame event queue
+        itself; see BoardHost)
+    config_file -- name of the file the configuration was loaded from
+        (optional - needed to reload the configuration when it changes)
+
+    Hot reload: if hot_reload.enabled is set in the configuration, the
+    activity file (and config_file, if given) are checked for changes while
+    doors are being selected. Unopened doors get new activities and only the
+    affected door surfaces are rendered again. Changes to the size of the
+    board take effect when the next board is created.
+
+    Large boards: if board.visible_horiz and/or board.visible_vert are set in
+    the configuration to less than doors_horiz/doors_vert, the surface only
+    shows that many doors at a time and the view follows the selection
+    (board.scroll_mode is either "scroll" or "page"). Only doors inside the
+    view are ever rendered.
+
+    Door sizes and positions come from a BoardLayout computed once. The
+    surface does not need to be an exact multiple of the number of doors;
+    board.margin and board.gutter add space around and between doors.
     """
     @unique
     class State(Enum):
@@ -113,6 +152,52 @@ class ActivityBoard:
         RESTART = auto()
         QUIT = auto()
 
+    # Custom pygame event type used to inject actions from outside of the
+    # normal input devices (e.g., the remote control server). The event has
+    # an "action" attribute containing a value from the Action enum and an
+    # optional "board" attribute containing the index of the target board.
+    ACTION_EVENT = USEREVENT + 1
+
+    # Timer event that wakes the main loop while the board is idle
+    IDLE_TICK_EVENT = USEREVENT + 2
+
+    # States where the board can go idle (i.e., waiting for the player with
+    # nothing changing on screen)
+    IDLE_STATES = (State.SELECTING, State.ALL_REVEALED)
+
+    # States where the main loop does background work while waiting for
+    # the player
+    BACKGROUND_WORK_STATES = (State.SELECTING, State.IN_PROGRESS)
+
+    # States that can be saved with get_snapshot() and resumed later
+    RESUMABLE_STATES = (
+        State.SELECTING, State.IN_PROGRESS, State.ALL_REVEALED)
+
+    # Ways of showing the idle board
+    IDLE_MODES = ('dim', 'blank', 'attract')
+
+    # Actions that move the selection - these can be auto-repeated and are
+    # combined into one move when several are queued
+    NAVIGATION_ACTIONS = (Action.UP, Action.DOWN, Action.LEFT, Action.RIGHT)
+
+    # Position of each direction in the BoardLayout neighbour table
+    NEIGHBOUR_DIRECTIONS = {
+        Action.UP: 0,
+        Action.DOWN: 1,
+        Action.LEFT: 2,
+        Action.RIGHT: 3
+    }
+
+    # Actions that skip the animation that is currently running (i.e.,
+    # pressing the open button again while a door is opening)
+    SKIP_ACTIONS = (Action.OPEN,)
+
+    # Seconds that the Back button must be held to quit the game
+    QUIT_HOLD_TIME = 2.0
+
+    # Optional weight at the end of a line in the activity file
+    WEIGHT_PATTERN = re.compile(r'\s*@\s*(\d+(?:\.\d+)?)\s*$')
+
     @property
     def num_doors(self) -> int:
         """Returns total number of doors on the board."""
@@ -121,116 +206,481 @@ class ActivityBoard:
     @property
     def door_width(self) -> int:
         """Returns width (in pixels) of one door."""
-        return self._surface.get_width() // self._doors_horiz
+        return self._layout.door_width
 
     @property
     def door_height(self) -> int:
         """Returns height (in pixels) of one door."""
-        return self._surface.get_height() // self._doors_vert
+        return self._layout.door_height
 
     def __init__(
-            self, surface: pygame.Surface, config: dict,
+            self, surface: Union[pygame.Surface, TextureDisplay],
+            config: dict,
             start_hidden: bool = False,
-            surface_is_display: bool = True) -> None:
+            surface_is_display: bool = True,
+            assets: Union[AssetCache, None] = None,
+            joystick_id: int = 0,
+            input_pump=None,
+            config_file: Union[str, None] = None) -> None:
         doors_horiz = config['board']['doors_horiz']
         doors_vert = config['board']['doors_vert']
 
-        if surface.get_width() % doors_horiz != 0:
-            raise RuntimeError('surface width must be an integer '
-                'multiple of doors_horiz')
-
-        if surface.get_height() % doors_vert != 0:
-            raise RuntimeError('surface height must be an integer '
-                'multiple of doors_vert')
+        # Number of doors that fit on the surface at once - defaults to the
+        # whole board
+        visible_horiz = min(
+            config['board'].get('visible_horiz', doors_horiz), doors_horiz)
+        visible_vert = min(
+            config['board'].get('visible_vert', doors_vert), doors_vert)
+
+        self._layout = BoardLayout(
+            width=surface.get_width(),
+            height=surface.get_height(),
+            doors_horiz=doors_horiz,
+            doors_vert=doors_vert,
+            visible_horiz=visible_horiz,
+            visible_vert=visible_vert,
+            margin=config['board'].get('margin', 0),
+            gutter=config['board'].get('gutter', 0))
 
         self._surface = surface
         self._config = config
 
+        # Surfaces drawn to a TextureDisplay are uploaded to GPU textures
+        self._uses_textures = isinstance(surface, TextureDisplay)
+
         self._surface_is_display = surface_is_display
 
+        if assets is None:
+            assets = AssetCache()
+
+        self._assets = assets
+
         self._bg_color = pygame.Color(config['board']['bg_color'])
 
         self._width = surface.get_width()
         self._height = surface.get_height()
 
-        activity_font = pygame.font.Font(
-            config['board']['font']['activity']['file'],
-            config['board']['font']['activity']['size'])
-
-        line_spacing = self._config['board']['line_spacing']
-
-        activity_color = pygame.Color(
-                self._config['board']['color']['activity'])
-
         # One full-screen activity renderer for the whole class
-        self.activity_renderer = TextRenderer(
-            activity_font,
-            line_spacing,
-            activity_color)
+        self.activity_renderer = self._build_activity_renderer(config)
 
         self._doors_horiz = doors_horiz
         self._doors_vert = doors_vert
 
+        self._visible_horiz = visible_horiz
+        self._visible_vert = visible_vert
+
+        self._scroll_mode = config['board'].get('scroll_mode', 'scroll')
+
+        if self._scroll_mode not in ('scroll', 'page'):
+            raise RuntimeError('scroll_mode must be "scroll" or "page"')
+
+        # Column and row of the door shown in the top left corner of the view
+        self._view_col = 0
+        self._view_row = 0
+
         self._start_hidden = start_hidden
 
-        self._activities = self._read_activities(config['activity_file'])
-        self._doors = self._build_door_list(
-                self._activities, doors_hidden=start_hidden)
-
-        self._move_sounds = self._build_sound_list(
-                config['board']['sound']['move'])
-        self._open_sounds = self._build_sound_list(
-                config['board']['sound']['open'])
-        self._oops_sounds = self._build_sound_list(
-                config['board']['sound']['oops'])
-        self._start_sounds = self._build_sound_list(
-                config['board']['sound']['start'])
-        self._reveal_all_sounds = self._build_sound_list(
-                config['board']['sound']['reveal_all'])
+        self._load_activities(config['activity_file'])
+
+        # Optionally make activities opened in recent games less likely
+        self._history = None
+
+        history_config = config.get('activity_history', {})
+
+        if history_config.get('enabled'):
+            self._history = ActivityHistory(
+                file=history_config.get('file', 'activity_history.json'),
+                games=history_config.get('games', 5),
+                penalty=history_config.get('penalty', 0.25))
+
+        # Activities (as read from the file) behind each door and opened
+        # during the current game
+        self._door_activities = []
+        self._opened_activities = []
+
+        # One DoorProperties object shared by all doors (flyweight)
+        self._door_props = self._build_door_props(config)
+
+        # Optional limit on the memory used by cached door surfaces
+        budget_mb = config.get('memory', {}).get('cache_budget_mb')
+
+        if budget_mb is None:
+            self._surface_budget = None
+        else:
+            self._surface_budget = SurfaceBudget(int(budget_mb * 1024 * 1024))
+
+        # Full-screen activity views are rendered ahead of time for the
+        # unopened doors in the view
+        self._activity_views = ActivityViewCache(
+            renderer=self.activity_renderer,
+            size=(self._width, self._height),
+            bg_color=self._bg_color,
+            depth=config['display'].get('depth', 0),
+            budget=self._surface_budget)
+
+        self._prepare_views = config['board'].get(
+            'prepare_activity_views', True)
+
+        # Surfaces for the views of the selected door and its four
+        # neighbours are allocated now, since allocating one takes longer
+        # than a slice of background work
+        if self._prepare_views:
+            self._activity_views.reserve(5)
+
+        # Door surfaces that will soon be needed (e.g., for opening the
+        # selected door) are rendered ahead of time
+        self._prepare_doors = config['board'].get('prepare_doors', True)
+
+        # Bytes per pixel of door surfaces, used to check whether more
+        # surfaces fit in the memory budget
+        if config['display'].get('depth', 0) == 16:
+            self._bytes_per_pixel = 2
+        else:
+            self._bytes_per_pixel = 4
+
+        self._doors = self._build_door_list(doors_hidden=start_hidden)
+
+        # Optionally render door surfaces in parallel before the game starts
+        prerender_config = config.get('prerender', {})
+
+        if prerender_config.get('enabled'):
+            prerenderer = DoorPrerenderer(
+                config, prerender_config.get('processes'))
+            prerenderer.prerender(self._visible_doors(), self._door_props)
+
+        # Sounds other than the start sound are loaded while the intro
+        # animation runs so that the first frame is shown sooner
+        self._pending_sounds = deque()
+        self._load_sounds(deferred=True)
 
         self._intro_step_time = config['board']['intro_step_time']
 
+        # Effect used when opening doors - anything other than the original
+        # "reveal" needs NumPy
+        self._transition_effect = config['door'].get('transition', 'reveal')
+
+        if self._transition_effect not in TRANSITION_EFFECTS:
+            raise RuntimeError('door transition must be one of: '
+                + ', '.join(TRANSITION_EFFECTS))
+
+        if (self._transition_effect != 'reveal'
+                and not transitions_available()):
+            raise RuntimeError(
+                f'door transition "{self._transition_effect}" requires NumPy')
+
+        # Transition built ahead of time for the selected door, as a tuple
+        # of the door, the before and after surfaces and the DoorTransition
+        self._next_transition = None
+
+        # Background work done in small steps while waiting for the player
+        self._idle_scheduler = self._build_idle_scheduler(
+            config['board'].get('idle_slice_time', 0.005))
+
         # Initialize pygame if it hasn't been initialized already
         if not pygame.get_init():
             # Use small buffer size to prevent delays when playing sounds
             pygame.mixer.init(buffer=512)
             pygame.init()
 
+        self._state = ActivityBoard.State.START
+        self._selected_door = None
+
+        # State to show instead of starting a new game, set by
+        # restore_snapshot()
+        self._resume_state = None
+
+        # Set when the game is over to indicate whether the player
+        # wants to play again
+        self.play_again = False
+
+        # Functions called with this board as the only argument whenever
+        # the state of the board changes
+        self._listeners = []
+
+        # Functions called with the surface and the list of redrawn
+        # rectangles whenever the display is updated, and the rectangles
+        # redrawn since the last update (only tracked if there are any
+        # frame listeners)
+        self._frame_listeners = []
+        self._dirty_rects = []
+
+        # Player actions are collected here, including while animations are
+        # running, and handled in order
+        self._input = InputQueue(
+            max_size=config['board'].get('input_queue_size', 16),
+            max_age=config['board'].get('input_max_age', 2.0))
+
+        self._input_pump = input_pump
+
+        # Held navigation keys and d-pad directions repeat automatically
+        self._repeat = AutoRepeat(
+            delay=config['board'].get('repeat_delay', 0.4),
+            rate=config['board'].get('repeat_rate', 10))
+
+        # Optional power-saving mode after a period without input
+        idle_config = config.get('idle', {})
+
+        if idle_config.get('enabled'):
+            self._idle_timeout = idle_config.get('timeout', 300)
+        else:
+            self._idle_timeout = None
+
+        self._idle_mode = idle_config.get('mode', 'dim')
+
+        if self._idle_mode not in ActivityBoard.IDLE_MODES:
+            raise RuntimeError(
+                f'Invalid idle mode: {self._idle_mode} (must be one of '
+                f'{", ".join(ActivityBoard.IDLE_MODES)})')
+
+        self._idle_tick_rate = idle_config.get('tick_rate', 1)
+
+        if self._idle_tick_rate <= 0:
+            raise RuntimeError(
+                f'Invalid idle tick rate: {self._idle_tick_rate} '
+                '(must be greater than 0)')
+
+        self._idle_dim_level = idle_config.get('dim_level', 0.25)
+
+        self._last_input_time = time.monotonic()
+
+        # Time when the Back button was pressed, or None if it is not held
+        self._back_pressed_time = None
+
+        # Optionally watch the activity and configuration files for changes
+        self._config_file = config_file
+        self._watcher = None
+
+        hot_reload_config = config.get('hot_reload', {})
+
+        if hot_reload_config.get('enabled'):
+            watch_files = [config['activity_file']]
+
+            if config_file is not None:
+                watch_files.append(config_file)
+
+            self._watcher = FileWatcher(
+                watch_files, hot_reload_config.get('interval', 1.0))
+
         # Joystick is optional - see documentation for controls
-        if pygame.joystick.get_count():
-            self._joystick = pygame.joystick.Joystick(0)
+        if pygame.joystick.get_count() > joystick_id:
+            self._joystick = pygame.joystick.Joystick(joystick_id)
             self._joystick.init()
+        else:
+            self._joystick = None
+
+    @property
+    def config(self) -> dict:
+        """
+        Returns the current configuration, including any changes loaded
+        by hot reload.
+        """
+        return self._config
+
+    def _build_activity_renderer(self, config: dict) -> TextRenderer:
+        """
+        Builds the TextRenderer used to show activities on the whole
+        activity board surface.
+
+        Arguments:
+        config -- configuration dictionary to build the renderer from
+        """
+        activity_font = self._assets.get_font(
+            config['board']['font']['activity']['file'],
+            config['board']['font']['activity']['size'],
+            config['display'].get('text_backend', 'font'))
+
+        line_spacing = config['board']['line_spacing']
+
+        activity_color = pygame.Color(
+                config['board']['color']['activity'])
+
+        return TextRenderer(
+            activity_font,
+            line_spacing,
+            activity_color,
+            config['display'].get('depth', 0))
+
+    def _load_sounds(self, deferred: bool = False) -> None:
+        """
+        Builds the sound lists for each sound effect.
+
+        Arguments:
+        deferred -- if True, only the start sound is loaded now and the
+            other sounds are added to their lists later by
+            _load_pending_sounds()
+        """
+        sound_config = self._config['board']['sound']
+
+        self._start_sounds = self._build_sound_list(sound_config['start'])
+
+        self._move_sounds = []
+        self._open_sounds = []
+        self._oops_sounds = []
+        self._reveal_all_sounds = []
+
+        self._pending_sounds.clear()
+
+        for sound_list, files in (
+                (self._move_sounds, sound_config['move']),
+                (self._open_sounds, sound_config['open']),
+                (self._oops_sounds, sound_config['oops']),
+                (self._reveal_all_sounds, sound_config['reveal_all'])):
+            for f in files:
+                self._pending_sounds.append((sound_list, f))
 
-    def _door_x_coord(self, index: int) -> int:
+        if not deferred:
+            self._load_pending_sounds()
+
+    def _load_pending_sounds(
+            self, deadline: Union[float, None] = None) -> None:
+        """
+        Loads sounds that were deferred by _load_sounds().
+
+        Arguments:
+        deadline -- time.monotonic() value after which no more sounds are
+            loaded (optional - if None, all remaining sounds are loaded)
+        """
+        while self._pending_sounds:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+            sound_list, file_name = self._pending_sounds.popleft()
+
+            sound_list.append(self._assets.get_sound(file_name))
+
+    def _door_position(self, index: int) -> Tuple[int, int]:
+        """
+        Returns the surface coordinates (in pixels) of a door inside the
+        current view from the precomputed layout.
+        """
+        cell = (((index // self._doors_horiz) - self._view_row)
+            * self._visible_horiz
+            + (index % self._doors_horiz) - self._view_col)
+
+        return self._layout.positions[cell]
+
+    def _is_door_visible(self, index: int) -> bool:
+        """
+        Returns True if the door with the given index is inside the current
+        view.
+        """
+        col = index % self._doors_horiz
+        row = index // self._doors_horiz
+
+        return (self._view_col <= col < self._view_col + self._visible_horiz
+            and self._view_row <= row < self._view_row + self._visible_vert)
+
+    def _visible_doors(self) -> List[Door]:
         """
-        Calculate and return the screen X coordinate (in pixels) of the door.
+        Returns list of the Door objects inside the current view.
+
+        Cost depends only on the size of the view, not the size of the board.
         """
-        return (index % self._doors_horiz) * self.door_width
+        doors = []
+
+        for row in range(
+                self._view_row, self._view_row + self._visible_vert):
+            start = row * self._doors_horiz + self._view_col
+
+            doors.extend(self._doors[start:start + self._visible_horiz])
 
-    def _door_y_coord(self, index: int) -> int:
+        return doors
+
+    def _scroll_to(self, door: Door) -> bool:
         """
-        Calculate and return the screen Y coordinate (in pixels) of the door.
+        Moves the view so that the door is visible.
+
+        In "scroll" mode the view moves by the minimum amount needed. In
+        "page" mode the view jumps by a whole screen of doors.
+
+        Returns True if the view changed (i.e., all visible doors need to be
+        redrawn).
         """
-        return (index // self._doors_horiz) * self.door_height
+        col = door.index % self._doors_horiz
+        row = door.index // self._doors_horiz
+
+        if self._scroll_mode == 'page':
+            new_col = (col // self._visible_horiz) * self._visible_horiz
+            new_row = (row // self._visible_vert) * self._visible_vert
+
+            # Last page is aligned with the edge of the board so that the
+            # view is always full
+            new_col = min(new_col, self._doors_horiz - self._visible_horiz)
+            new_row = min(new_row, self._doors_vert - self._visible_vert)
+        else:
+            new_col = min(
+                max(self._view_col, col - self._visible_horiz + 1), col)
+            new_row = min(
+                max(self._view_row, row - self._visible_vert + 1), row)
+
+        if new_col == self._view_col and new_row == self._view_row:
+            return False
+
+        old_visible = self._visible_doors()
+
+        self._view_col = new_col
+        self._view_row = new_row
+
+        # Only doors inside the view keep their cached surfaces
+        for d in old_visible:
+            if not self._is_door_visible(d.index):
+                d.clear_cache()
+                self._activity_views.clear_cache((d.index,))
+
+        return True
 
     def _clear_surface(self) -> None:
         """
         Clear the underlying surface by filling with background color.
         """
         self._surface.fill(self._bg_color)
+        self._mark_dirty()
 
         if self._surface_is_display:
-            pygame.display.update()
+            self._update_display()
 
-    def _read_activities(self, file_name: str) -> List[str]:
-        """Read activities from file (one per line)."""
+    def _read_activities(
+            self, file_name: str) -> Tuple[List[str], List[float]]:
+        """
+        Read activities from file (one per line) and return the list of
+        activities and the list of their weights.
+
+        A line can end with @ and a number to give the activity a weight
+        other than 1 (e.g., "JOG 2 LAPS @3" is chosen three times as often).
+        """
         activities = []
+        weights = []
 
         with open(file_name, 'r') as activity_file:
             for line in activity_file:
-                activities.append(line.strip())
+                line = line.strip()
+
+                match = ActivityBoard.WEIGHT_PATTERN.search(line)
+
+                if match:
+                    activities.append(line[:match.start()])
+                    weights.append(float(match.group(1)))
+                else:
+                    activities.append(line)
+                    weights.append(1.0)
+
+        return activities, weights
+
+    def _load_activities(self, file_name: str) -> None:
+        """
+        Reads the activity file and builds the sampler used to choose
+        activities for the doors.
+        """
+        self._activities, weights = self._read_activities(file_name)
 
-        return activities
+        self._sampler = ActivitySampler(weights)
+
+        # Snapshots refer to activities by their index in the list, so they
+        # are only valid for the same list
+        self._activities_crc = zlib.crc32(
+            '\n'.join(self._activities).encode('utf-8'))
+        self._activity_indices = {
+            activity: i for i, activity in enumerate(self._activities)}
 
     def _build_sound_list(
             self, sound_files: List[str]) -> List[pygame.mixer.Sound]:
@@ -240,84 +690,279 @@ class ActivityBoard:
         sound_list = []
 
         for f in sound_files:
-            sound_list.append(pygame.mixer.Sound(f))
+            sound_list.append(self._assets.get_sound(f))
 
         return sound_list
 
-    def _build_door_list(
-            self, activities: List[str],
-            doors_hidden: bool = False) -> List[Door]:
+    def _build_door_props(self, config: dict) -> DoorProperties:
+        """
+        Build the DoorProperties object shared by all doors on the board.
+
+        Fonts and colors are identical for every door, so they are loaded
+        only once. Use DoorProperties.with_overrides() to give an individual
+        door its own look.
+
+        Arguments:
+        config -- configuration dictionary to build the properties from
+        """
+        return DoorProperties.from_config(config, self._assets)
+
+    def _build_door_list(self, doors_hidden: bool = False) -> List[Door]:
         """
         Build list of Door objects for use on the activity board.
 
         Arguments:
-        activities -- list of activities that can be behind doors (newlines are
-            represented by backticks: `)
         doors_hidden -- boolean that determines if the doors start off hidden
             (i.e., not displayed when calling Door.draw())
         """
         doors = []
 
-        door_colors = self._config['door']['color']
-
-        for i in range(self.num_doors):
-            activity_font = pygame.font.Font(
-                self._config['door']['font']['activity']['file'],
-                self._config['door']['font']['activity']['size'])
-
-            number_font = pygame.font.Font(
-                self._config['door']['font']['number']['file'],
-                self._config['door']['font']['number']['size'])
-
-            # Individual props object for each door to allow for later
-            # customization
-            props = DoorProperties(
-                bg_color=pygame.Color(self._config['board']['bg_color']),
-                door_color=pygame.Color(door_colors['door']),
-                ellipse_color=pygame.Color(door_colors['ellipse']),
-                number_color=pygame.Color(door_colors['number']),
-                cross_color=pygame.Color(door_colors['cross']),
-                selection_color=pygame.Color(door_colors['selection']),
-                activity_color=pygame.Color(door_colors['activity']),
-                unused_color=pygame.Color(door_colors['unused']),
-                activity_font=activity_font,
-                line_spacing=self._config['door']['line_spacing'],
-                number_font=number_font,
-                border_size=self._config['door']['border_size'],
-                ellipse_margin=self._config['door']['ellipse_margin'],
-                cross_width=self._config['door']['cross_width'],
-                cross_offset=self._config['door']['cross_offset'],
-                open_step_time=self._config['door']['open_step_time'])
-
-            # Choose a random activity for the door
-            activity = random.choice(activities)
-            
-            # Remove the activity from the list to prevent duplicates
-            activities.remove(activity)
-
-            # Handle varied repetitions
-            if '(' in activity and ')' in activity:
-                # Keep the parentheses for ease of replacing later
-                rep_string = activity[
-                    activity.find('('):activity.find(')') + 1
-                ]
-
-                # Strip off any parentheses in the chosen number of reps
-                reps = random.choice(rep_string.split('|')).strip('()')
-
-                # Replace the string of options with the chosen value
-                activity = activity.replace(rep_string, reps)
+        self._door_activities = self._choose_activities(self.num_doors)
 
+        for i, activity in enumerate(self._door_activities):
             doors.append(Door(
                 index=i,
                 height=self.door_height,
                 width=self.door_width,
-                activity=activity,
-                props=props,
-                is_hidden=doors_hidden))
+                activity=self._resolve_repetitions(activity),
+                props=self._door_props,
+                is_hidden=doors_hidden,
+                budget=self._surface_budget))
 
         return doors
 
+    def _choose_activities(
+            self, count: int,
+            exclude: Union[Iterable[str], None] = None) -> List[str]:
+        """
+        Chooses count different activities at random according to their
+        weights and the optional history of recent games.
+
+        Arguments:
+        count -- number of activities to choose
+        exclude -- activities that must not be chosen (optional - activities
+            that are not in the activity file are ignored)
+        """
+        if self._history is None:
+            acceptance = None
+        else:
+            def acceptance(index):
+                return self._history.factor(self._activities[index])
+
+        if exclude is None:
+            excluded = None
+        else:
+            excluded = {self._activity_indices[a] for a in exclude
+                if a in self._activity_indices}
+
+        return [self._activities[i]
+            for i in self._sampler.sample(count, acceptance, excluded)]
+
+    def _rep_options(self, activity: str) -> Tuple[str, List[str]]:
+        """
+        Returns the varied repetitions in an activity as a string (e.g.,
+        "(5|10)") and a list of the options, or an empty string and an
+        empty list if the activity has no varied repetitions.
+        """
+        if '(' in activity and ')' in activity:
+            # Keep the parentheses for ease of replacing later
+            rep_string = activity[
+                activity.find('('):activity.find(')') + 1
+            ]
+
+            # Strip off any parentheses in each number of reps
+            return rep_string, [
+                reps.strip('()') for reps in rep_string.split('|')]
+
+        return '', []
+
+    def _resolve_repetitions(
+            self, activity: str, choice: Union[int, None] = None) -> str:
+        """
+        Returns the activity with any varied repetitions resolved.
+
+        Arguments:
+        activity -- activity as read from the activity file (newlines are
+            represented by backticks: `)
+        choice -- index of the option to use (optional - if None or not a
+            valid option, an option is chosen at random)
+        """
+        rep_string, options = self._rep_options(activity)
+
+        # Handle varied repetitions
+        if options:
+            if choice is None or choice >= len(options):
+                reps = random.choice(options)
+            else:
+                reps = options[choice]
+
+            # Replace the string of options with the chosen value
+            activity = activity.replace(rep_string, reps)
+
+        return activity
+
+    def _rep_choice(self, activity: str, resolved: str) -> int:
+        """
+        Returns the index of the repetition option that turned activity
+        into resolved, or BoardSnapshot.NO_CHOICE if there is none.
+        """
+        rep_string, options = self._rep_options(activity)
+
+        for i, reps in enumerate(options[:BoardSnapshot.NO_CHOICE]):
+            if activity.replace(rep_string, reps) == resolved:
+                return i
+
+        return BoardSnapshot.NO_CHOICE
+
+    def _reload_activities(self) -> None:
+        """
+        Reads the activity file again and chooses new activities for all
+        doors that have not been opened yet.
+
+        Only the cached surfaces that show the activity are discarded.
+        """
+        self._load_activities(self._config['activity_file'])
+
+        closed_doors = [d for d in self._doors if not d.is_open]
+
+        # Activities behind opened doors must not be chosen again
+        in_use = set(self._opened_activities)
+        in_use.update(self._door_activities[d.index]
+            for d in self._doors if d.is_open)
+
+        # Keep the current activity of the last doors if there are not
+        # enough new ones. Kept activities must not be chosen again either.
+        while len(closed_doors) > len(self._activities) - len(
+                in_use.intersection(self._activity_indices)):
+            kept_door = closed_doors.pop()
+
+            in_use.add(self._door_activities[kept_door.index])
+
+        activities = self._choose_activities(len(closed_doors), in_use)
+
+        for d, activity in zip(closed_doors, activities):
+            self._door_activities[d.index] = activity
+
+            d.activity = self._resolve_repetitions(activity)
+            d.clear_cache(('revealed', 'unused'))
+
+            self._activity_views.clear_cache((d.index,))
+
+    def _reload_config(self) -> None:
+        """
+        Reads the configuration file again and applies the settings that
+        can be changed while the board is running.
+
+        Door surfaces are rendered again only if they depend on door
+        properties that changed.
+        """
+        with open(self._config_file, 'r') as f:
+            new_config = json.load(f)
+
+        # The display is not created again, so keep the depth that it
+        # actually got (see main.py)
+        new_config['display']['depth'] = self._config['display'].get(
+            'depth', 0)
+
+        # Build everything from the new configuration before changing the
+        # board, so a file with errors leaves the board as it was
+        bg_color = pygame.Color(new_config['board']['bg_color'])
+        activity_renderer = self._build_activity_renderer(new_config)
+
+        sound_config = new_config['board']['sound']
+
+        start_sounds = self._build_sound_list(sound_config['start'])
+        move_sounds = self._build_sound_list(sound_config['move'])
+        open_sounds = self._build_sound_list(sound_config['open'])
+        oops_sounds = self._build_sound_list(sound_config['oops'])
+        reveal_all_sounds = self._build_sound_list(sound_config['reveal_all'])
+
+        new_props = self._build_door_props(new_config)
+
+        intro_step_time = new_config['board']['intro_step_time']
+        activity_file = new_config['activity_file']
+
+        old_activity_file = self._config['activity_file']
+
+        self._config = new_config
+
+        self._bg_color = bg_color
+        self.activity_renderer = activity_renderer
+
+        self._pending_sounds.clear()
+
+        self._start_sounds = start_sounds
+        self._move_sounds = move_sounds
+        self._open_sounds = open_sounds
+        self._oops_sounds = oops_sounds
+        self._reveal_all_sounds = reveal_all_sounds
+
+        self._activity_views.renderer = activity_renderer
+        self._activity_views.bg_color = bg_color
+        self._activity_views.clear_cache()
+
+        self._intro_step_time = intro_step_time
+
+        self._repeat.delay = new_config['board'].get('repeat_delay', 0.4)
+        self._repeat.rate = new_config['board'].get('repeat_rate', 10)
+
+        old_props = self._door_props
+
+        stale_keys = set()
+
+        for name in old_props.changed_properties(new_props):
+            stale_keys.update(Door.SURFACE_DEPENDENCIES[name])
+
+        self._door_props = new_props
+
+        # Doors with their own DoorProperties object are left alone
+        for d in self._doors:
+            if d.props is old_props:
+                d.props = new_props
+                d.clear_cache(stale_keys)
+
+        # The new activity file is read by _check_reload()
+        if activity_file != old_activity_file:
+            self._watcher.unwatch(old_activity_file)
+            self._watcher.watch(activity_file)
+
+    def _check_reload(self) -> None:
+        """
+        Applies changes to the activity and configuration files, if any,
+        and redraws the board.
+        """
+        changed = self._watcher.check()
+
+        if not changed:
+            return
+
+        old_activity_file = self._config['activity_file']
+
+        reloaded = False
+
+        # A file that cannot be read might be only partially written, so
+        # it is read again at the next check. The other file is still
+        # reloaded so that its change is not lost.
+        if self._config_file in changed:
+            try:
+                self._reload_config()
+
+                reloaded = True
+            except (OSError, ValueError, KeyError, pygame.error):
+                self._watcher.forget(self._config_file)
+
+        if (self._config['activity_file'] in changed
+                or self._config['activity_file'] != old_activity_file):
+            try:
+                self._reload_activities()
+
+                reloaded = True
+            except OSError:
+                self._watcher.forget(self._config['activity_file'])
+
+        if reloaded:
+            self._draw_all_doors()
+
     def _play_random_sound(self, sound_list: List[pygame.mixer.Sound]) -> None:
         """
         Plays one random sound from a list of pygame Sound objects.
@@ -343,41 +988,9 @@ class ActivityBoard:
         
         NOTE: This method takes a Door object as input but return an integer
             door index as the result.
-
-        TODO: Change the above to be more consistent.
         """
-        old_index = door.index
-
-        old_index_h = old_index % self._doors_horiz
-        old_index_v = old_index // self._doors_horiz
-
-        new_index_h = old_index_h
-        new_index_v = old_index_v
-
-        if action is ActivityBoard.Action.UP:
-            new_index_v = old_index_v - 1
-        elif action is ActivityBoard.Action.DOWN:
-            new_index_v = old_index_v + 1
-        elif action is ActivityBoard.Action.LEFT:
-            new_index_h = old_index_h - 1
-        elif action is ActivityBoard.Action.RIGHT:
-            new_index_h = old_index_h + 1
-
-        if new_index_h < 0:
-            new_index_h = old_index_h
-
-        if new_index_h > self._doors_horiz - 1:
-            new_index_h = old_index_h
-
-        if new_index_v < 0:
-            new_index_v = 0
-
-        if new_index_v > self._doors_vert - 1:
-            new_index_v = old_index_v
-
-        new_index = new_index_v * self._doors_horiz + new_index_h
-
-        return new_index
+        return self._layout.neighbours[door.index][
+            ActivityBoard.NEIGHBOUR_DIRECTIONS[action]]
 
     def _translate_action(
             self, event: pygame.event.Event) -> Union[Action, None]:
@@ -390,7 +1003,9 @@ class ActivityBoard:
         Arguments:
         event -- the pygame event to be translated
         """
-        if event.type == JOYBUTTONDOWN:
+        if event.type == ActivityBoard.ACTION_EVENT:
+            return event.action
+        elif event.type == JOYBUTTONDOWN:
             # Button is an IntEnum so compare by value instead of identity
             if event.button == Button.BTN_A:
                 return ActivityBoard.Action.OPEN
@@ -402,19 +1017,12 @@ class ActivityBoard:
             elif event.button == Button.BTN_START:
                 return ActivityBoard.Action.RESTART
             elif event.button == Button.BTN_BACK:
-                    timestamp = time.monotonic()
-
-                    pygame.event.clear()
-
-                    # Only return QUIT action if Back button is held for
-                    # at least 2 seconds
-                    while self._joystick.get_button(Button.BTN_BACK):
-                        # Event queue needs to be pumped in order for
-                        # get_button() to update properly
-                        pygame.event.pump()
-                        
-                        if time.monotonic() - timestamp > 2:
-                            return ActivityBoard.Action.QUIT
+                # Only quit if the Back button is held for QUIT_HOLD_TIME
+                # seconds - see _poll_back_button()
+                self._back_pressed_time = time.monotonic()
+        elif event.type == JOYBUTTONUP:
+            if event.button == Button.BTN_BACK:
+                self._back_pressed_time = None
         elif event.type == JOYHATMOTION:
             if event.value[0] and event.value[1]:
                 # Diagonal movement not supported
@@ -463,42 +1071,84 @@ class ActivityBoard:
             should be updated after drawing. Set to False when drawing
             multiple doors in a loop.
         """
-        door_surface = door.get_door_surface()
+        # Doors outside the view are never rendered
+        if not self._is_door_visible(door.index):
+            return
 
-        self._surface.blit(
-            door_surface,
-            (self._door_x_coord(door.index),
-            self._door_y_coord(door.index)))
+        x, y = self._door_position(door.index)
+
+        self._mark_dirty(pygame.Rect(x, y, door.width, door.height))
+
+        # Drawing the layers directly avoids building a new surface for
+        # each frame of the opening animation
+        for layer, (dx, dy), area in door.get_door_layers():
+            if self._uses_textures and door.transition is not None:
+                # Transition frames reuse one surface with new pixels
+                self._surface.refresh(layer)
+
+            self._surface.blit(layer, (x + dx, y + dy), area)
 
         if update_display and self._surface_is_display:
+            self._update_display()
+
+    def _mark_dirty(self, rect: Union[pygame.Rect, None] = None) -> None:
+        """
+        Records a redrawn rectangle (default is the whole surface) for the
+        frame listeners.
+        """
+        if self._frame_listeners:
+            if rect is None:
+                rect = self._surface.get_rect()
+
+            self._dirty_rects.append(rect)
+
+    def _update_display(self) -> None:
+        """Shows everything drawn so far on the display."""
+        if self._dirty_rects:
+            for listener in self._frame_listeners:
+                listener(self._surface, self._dirty_rects)
+
+            self._dirty_rects = []
+
+        if self._uses_textures:
+            self._surface.update()
+        else:
             pygame.display.update()
 
     def _draw_updated_doors(self) -> None:
         """
         Draws only doors that are marked as being changed by setting their
         is_updated property.
+
+        Doors outside the view keep their is_updated flag and are drawn
+        when they scroll into view.
         """
-        for d in self._doors:
+        for d in self._visible_doors():
             if d.is_updated:
                 self._draw_door(d, update_display=False)
                 d.is_updated = False
     
         if self._surface_is_display:
-            pygame.display.update()
+            self._update_display()
 
     def _draw_all_doors(self) -> None:
         """
-        Draws all doors onto activity board surface.
+        Draws all visible doors onto activity board surface.
 
         For best performance, keep track of which doors have been updated
         and call _draw_door() for only those doors.
         """
-        for d in self._doors:
+        # Margins, gutters and leftover pixels are not covered by doors
+        if self._layout.has_gaps:
+            self._surface.fill(self._bg_color)
+            self._mark_dirty()
+
+        for d in self._visible_doors():
             self._draw_door(d, update_display=False)
             d.is_updated = False
         
         if self._surface_is_display:
-            pygame.display.update()
+            self._update_display()
 
     def _show_activity(self, door: Door) -> None:
         """
@@ -508,32 +1158,171 @@ class ActivityBoard:
         Arguments:
         door -- the Door object contaning the activity
         """
-        activity_surface = self.activity_renderer.render_surface(door.activity)
+        # Usually rendered ahead of time by the idle scheduler
+        view = self._activity_views.get_view(door)
 
-        self._surface.fill(self._bg_color)
-
-        activity_rect = activity_surface.get_rect()
+        if self._uses_textures:
+            # View surfaces are reused for other activities
+            self._surface.refresh(view)
 
-        self._surface.blit(
-                activity_surface,
-                ((self._width // 2) - (activity_rect.width // 2),
-                (self._height // 2) - (activity_rect.height // 2)))
+        self._surface.blit(view, (0, 0))
+        self._mark_dirty()
 
         if self._surface_is_display:
-            pygame.display.update()
+            self._update_display()
 
-    def _animate_intro(self) -> None:
+    def _move_selection(self, actions: List[Action]) -> None:
         """
-        Runs the animated intro sequence, which shows doors one
-        by one in a random order.
+        Moves the selection by applying several movement actions in order,
+        then redraws and plays the move sound once for the net change.
+
+        Arguments:
+        actions -- list of values from the Action enum representing movement
+            directions
         """
-        # Doors start hidden, so this is a quick way to clear update flags and
-        # blank the screen at the same time
-        self._draw_all_doors()
+        selected_door = self._selected_door
 
-        intro_show_list = list(range(self.num_doors))
+        new_index = selected_door.index
 
-        while intro_show_list:
+        for action in actions:
+            new_index = self._get_new_selection(self._doors[new_index], action)
+
+        if new_index != selected_door.index:
+            selected_door.is_selected = False
+            selected_door.is_updated = True
+
+            self._doors[new_index].is_selected = True
+            self._doors[new_index].is_updated = True
+
+            self._selected_door = self._doors[new_index]
+
+            self._play_random_sound(self._move_sounds)
+
+            if self._scroll_to(self._selected_door):
+                self._draw_all_doors()
+            else:
+                self._draw_updated_doors()
+
+    def _repeat_source(self, event: pygame.event.Event):
+        """
+        Returns a value identifying the key or d-pad that produced an event
+        for use with AutoRepeat.
+        """
+        if event.type in (KEYDOWN, KEYUP):
+            return ('key', event.key)
+        elif event.type == JOYHATMOTION:
+            return ('hat', ActivityBoard.event_joystick_id(event), event.hat)
+
+        return None
+
+    def _poll_back_button(self) -> None:
+        """
+        Queues the quit action once the Back button has been held for
+        QUIT_HOLD_TIME seconds. Releasing the button earlier cancels it.
+        """
+        if (self._back_pressed_time is not None
+                and time.monotonic() - self._back_pressed_time
+                    >= ActivityBoard.QUIT_HOLD_TIME):
+            self._back_pressed_time = None
+
+            self._input.put(ActivityBoard.Action.QUIT)
+
+    @staticmethod
+    def event_joystick_id(event: pygame.event.Event) -> int:
+        """
+        Returns the id of the joystick that produced a joystick event,
+        comparable with the joystick_id property.
+
+        The deprecated joy attribute is only used on pygame 1.x, which
+        does not have instance ids.
+        """
+        if hasattr(event, 'instance_id'):
+            return event.instance_id
+
+        return event.joy
+
+    def _pump_input(self) -> None:
+        """
+        Collects all pending input into the action queue without handling
+        it. Called continuously by the main loop and during animations.
+        """
+        if self._input_pump is not None:
+            self._input_pump()
+        else:
+            for event in pygame.event.get():
+                self.queue_event(event)
+
+    def _wait(self, seconds: float) -> None:
+        """
+        Waits for the specified time (e.g., between animation steps) while
+        still collecting input.
+        """
+        end_time = time.monotonic() + seconds
+
+        self._pump_input()
+
+        # Use the time between frames to load deferred sounds and do
+        # background work
+        self._load_pending_sounds(end_time)
+        self._idle_scheduler.run(end_time)
+
+        remaining = end_time - time.monotonic()
+
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def _begin_transition(self, door: Door) -> None:
+        """
+        Prepares the configured transition effect for a door that is about
+        to be opened.
+        """
+        if self._transition_effect == 'reveal':
+            return
+
+        before, after = self._transition_surfaces(door)
+
+        prepared = self._next_transition
+        self._next_transition = None
+
+        # Use the transition built by _prepare_transition() if the door
+        # still looks the same
+        if (prepared is not None and prepared[0] is door
+                and prepared[1] is before and prepared[2] is after):
+            door.transition = prepared[3]
+        else:
+            door.transition = DoorTransition(
+                self._transition_effect, before, after)
+
+    def _transition_surfaces(
+            self, door: Door) -> Tuple[pygame.Surface, pygame.Surface]:
+        """
+        Returns the surfaces at the start and end of the transition effect
+        for opening a door.
+        """
+        if door.is_selected:
+            before = door.get_cached_surface('closed_selected')
+        else:
+            before = door.get_cached_surface('closed')
+
+        return before, door.get_cached_surface('revealed')
+
+    def _animate_intro(self) -> None:
+        """
+        Runs the animated intro sequence, which shows doors one
+        by one in a random order.
+        """
+        # Doors start hidden, so this is a quick way to clear update flags and
+        # blank the screen at the same time
+        self._draw_all_doors()
+
+        # Doors outside the view are unhidden without animation
+        for d in self._doors:
+            if not self._is_door_visible(d.index):
+                d.is_hidden = False
+
+        intro_show_list = [d.index for d in self._visible_doors()]
+
+        while intro_show_list:
             intro_show_index = random.choice(intro_show_list)
 
             self._doors[intro_show_index].is_hidden = False
@@ -543,7 +1332,16 @@ class ActivityBoard:
 
             intro_show_list.remove(intro_show_index)
 
-            time.sleep(self._intro_step_time)
+            self._wait(self._intro_step_time)
+
+            if self._input.take(ActivityBoard.SKIP_ACTIONS):
+                for i in intro_show_list:
+                    self._doors[i].is_hidden = False
+                    self._doors[i].is_updated = True
+
+                self._draw_updated_doors()
+
+                break
 
     def _animate_open(self, door: Door) -> None:
         """
@@ -556,12 +1354,23 @@ class ActivityBoard:
 
         TODO: Remove magic numbers related to pct_open steps.
         """
+        self._begin_transition(door)
+
         for i in range(2, 102, 2):
             door.pct_open = i
 
             self._draw_door(door)
 
-            time.sleep(door.props.open_step_time)
+            self._wait(door.props.open_step_time)
+
+            if self._input.take(ActivityBoard.SKIP_ACTIONS):
+                door.pct_open = 100
+
+                self._draw_door(door)
+
+                break
+
+        door.transition = None
 
     def _animate_open_all(self) -> None:
         """
@@ -579,6 +1388,10 @@ class ActivityBoard:
 
         self._draw_updated_doors()
 
+        for d in self._visible_doors():
+            if not d.is_open:
+                self._begin_transition(d)
+
         for i in range(5, 105, 5):
             for d in self._doors:
                 if not d.is_open:
@@ -587,22 +1400,486 @@ class ActivityBoard:
 
             self._draw_updated_doors()
 
-            # This is unnecessary on Raspberry Pi 3 since the speed is
-            # already constrained by the speed of the system
-            # time.sleep(d.props.open_step_time)
+            # No delay is necessary on Raspberry Pi 3 since the speed is
+            # already constrained by the speed of the system, but input
+            # still needs to be collected
+            self._pump_input()
+
+            if self._input.take(ActivityBoard.SKIP_ACTIONS):
+                break
 
         for d in self._doors:
             d.is_revealed = True
             d.is_updated = True
+            d.transition = None
 
         self._draw_updated_doors()
 
+    @property
+    def state(self) -> State:
+        """Returns the current state of the game."""
+        return self._state
+
+    @property
+    def joystick_id(self) -> Union[int, None]:
+        """
+        Returns the instance id of the joystick controlling this board
+        (matching the instance_id of its events), or None if there is no
+        joystick.
+        """
+        if self._joystick is None:
+            return None
+
+        # pygame 1.x has no instance ids - joysticks are identified by the
+        # device index used in the events' joy attribute
+        if hasattr(self._joystick, 'get_instance_id'):
+            return self._joystick.get_instance_id()
+
+        return self._joystick.get_id()
+
+    @property
+    def selected_index(self) -> Union[int, None]:
+        """
+        Returns the index of the currently selected door, or None if the
+        game has not started yet.
+        """
+        if self._selected_door is None:
+            return None
+
+        return self._selected_door.index
+
+    @property
+    def selected_activity(self) -> Union[str, None]:
+        """
+        Returns the activity behind the currently selected door, or None if
+        the game has not started yet.
+        """
+        if self._selected_door is None:
+            return None
+
+        return self._selected_door.activity
+
+    def get_status(self) -> dict:
+        """
+        Returns a dictionary describing the current state of the board that
+        can be serialized to JSON.
+        """
+        return {
+            'state': self._state.name,
+            'selected': self.selected_index,
+            'open': [d.index for d in self._doors if d.is_open],
+            'doors_horiz': self._doors_horiz,
+            'doors_vert': self._doors_vert
+        }
+
+    def memory_usage(self) -> dict:
+        """
+        Returns a dictionary of the bytes used by the pixels of the board's
+        surfaces, by subsystem.
+        """
+        if self._uses_textures:
+            surface_usage = {'textures': self._surface.texture_bytes()}
+        else:
+            surface_usage = {'board surface': surface_bytes(self._surface)}
+
+        surface_usage['door cache'] = sum(
+            d.cached_bytes() for d in self._doors)
+        surface_usage['activity views'] = self._activity_views.cached_bytes()
+
+        return surface_usage
+
+    def add_frame_listener(self, listener) -> None:
+        """
+        Registers a function to be called whenever the display is updated,
+        with the board surface and a list of pygame Rect objects covering
+        the regions redrawn since the last update (e.g., to mirror the
+        board elsewhere).
+
+        Frame listeners are called from the main loop (including during
+        animations), so they must return quickly.
+        """
+        self._frame_listeners.append(listener)
+
+    def add_listener(self, listener) -> None:
+        """
+        Registers a function to be called (with this board as the only
+        argument) whenever the state of the board changes.
+
+        Listeners are called from the main loop, so they must return quickly.
+        """
+        self._listeners.append(listener)
+
+    def _notify_listeners(self) -> None:
+        """Calls all registered listener functions."""
+        for listener in self._listeners:
+            listener(self)
+
+    def can_reshuffle(self) -> bool:
+        """
+        Returns True if the board can be reused for a new game with
+        reshuffle(), or False if the size of the board was changed by hot
+        reload and a new ActivityBoard needs to be created.
+        """
+        board_config = self._config['board']
+
+        return (board_config['doors_horiz'] == self._doors_horiz
+            and board_config['doors_vert'] == self._doors_vert
+            and board_config.get('visible_horiz', self._doors_horiz)
+                == self._visible_horiz
+            and board_config.get('visible_vert', self._doors_vert)
+                == self._visible_vert
+            and board_config.get('scroll_mode', 'scroll')
+                == self._scroll_mode
+            and board_config.get('margin', 0) == self._layout.margin
+            and board_config.get('gutter', 0) == self._layout.gutter)
+
+    def reshuffle(self) -> None:
+        """
+        Prepares the board for a new game by choosing new activities and
+        resetting the state of every door, reusing the existing Door
+        objects, fonts and sounds.
+
+        Cached door surfaces that do not show the activity (e.g., the
+        closed doors) are kept.
+        """
+        self._door_activities = self._choose_activities(self.num_doors)
+        self._opened_activities = []
+
+        self._activity_views.clear_cache()
+
+        for d in self._doors:
+            d.activity = self._resolve_repetitions(
+                self._door_activities[d.index])
+            d.clear_cache(('revealed', 'unused'))
+
+            d.is_selected = False
+            d.is_open = False
+            d.is_revealed = False
+            d.is_hidden = self._start_hidden
+            d.is_updated = True
+            d.pct_open = 0
+
+        self._scroll_to(self._doors[0])
+
+        self._state = ActivityBoard.State.START
+        self._selected_door = None
+        self._resume_state = None
+        self._next_transition = None
+        self.play_again = False
+
+        self._input.clear()
+        self._back_pressed_time = None
+
+    def get_snapshot(self) -> Union[BoardSnapshot, None]:
+        """
+        Returns a compact snapshot of the current game that can be passed
+        to restore_snapshot() (e.g., after a crash), or None if the game
+        cannot be resumed (i.e., it is starting or over, or an activity
+        behind a door was removed from the activity file by hot reload).
+        """
+        if self._state not in ActivityBoard.RESUMABLE_STATES:
+            return None
+
+        open_doors = 0
+        activity_indices = []
+        rep_choices = []
+
+        for d in self._doors:
+            activity = self._door_activities[d.index]
+            activity_index = self._activity_indices.get(activity)
+
+            if activity_index is None:
+                return None
+
+            if d.is_open:
+                open_doors |= 1 << d.index
+
+            activity_indices.append(activity_index)
+            rep_choices.append(self._rep_choice(activity, d.activity))
+
+        return BoardSnapshot(
+            state=self._state.value,
+            selected=self._selected_door.index,
+            activities_crc=self._activities_crc,
+            open_doors=open_doors,
+            activity_indices=activity_indices,
+            rep_choices=rep_choices)
+
+    def restore_snapshot(self, snapshot: BoardSnapshot) -> bool:
+        """
+        Restores a game saved by get_snapshot(). The next call to start()
+        or run() shows the restored game straight away, without the intro.
+
+        Returns False (and leaves the board unchanged) if the snapshot does
+        not fit this board, e.g., because the number of doors or the
+        activity file has changed since it was taken.
+
+        Arguments:
+        snapshot -- the BoardSnapshot to restore
+        """
+        resumable = [s.value for s in ActivityBoard.RESUMABLE_STATES]
+
+        if (snapshot.num_doors != self.num_doors
+                or snapshot.activities_crc != self._activities_crc
+                or snapshot.state not in resumable
+                or snapshot.selected >= self.num_doors
+                or max(snapshot.activity_indices) >= len(self._activities)):
+            return False
+
+        state = ActivityBoard.State(snapshot.state)
+
+        self._door_activities = [
+            self._activities[i] for i in snapshot.activity_indices]
+
+        self._activity_views.clear_cache()
+
+        for d in self._doors:
+            d.activity = self._resolve_repetitions(
+                self._door_activities[d.index],
+                snapshot.rep_choices[d.index])
+            d.clear_cache(('revealed', 'unused'))
+
+            d.is_selected = d.index == snapshot.selected
+            d.is_open = snapshot.is_open(d.index)
+            d.is_revealed = state is ActivityBoard.State.ALL_REVEALED
+            d.is_hidden = False
+            d.is_updated = True
+            d.pct_open = 100 if d.is_open or d.is_revealed else 0
+
+        self._opened_activities = [
+            self._door_activities[d.index] for d in self._doors if d.is_open]
+
+        self._selected_door = self._doors[snapshot.selected]
+        self._resume_state = state
+
+        return True
+
+    def _resume(self) -> None:
+        """
+        Shows the game restored by restore_snapshot().
+        """
+        self._state = self._resume_state
+        self._resume_state = None
+
+        self._scroll_to(self._selected_door)
+
+        if self._state is ActivityBoard.State.IN_PROGRESS:
+            self._show_activity(self._selected_door)
+        else:
+            self._draw_all_doors()
+
+        self._load_pending_sounds()
+
+        self._notify_listeners()
+
+    def start(self) -> None:
+        """
+        Starts a new game by drawing all doors (with the optional animated
+        sequence) and selecting the first door, or shows the game restored
+        by restore_snapshot().
+        """
+        if self._resume_state is not None:
+            self._resume()
+
+            return
+
+        self._state = ActivityBoard.State.START
+
+        self._play_random_sound(self._start_sounds)
+
+        if self._start_hidden:
+            self._animate_intro()
+        else:
+            self._draw_all_doors()
+
+        self._doors[0].is_selected = True
+        self._doors[0].is_updated = True
+        self._selected_door = self._doors[0]
+
+        if self._scroll_to(self._selected_door):
+            self._draw_all_doors()
+        else:
+            self._draw_updated_doors()
+
+        # All sounds are needed once the player can move the selection
+        self._load_pending_sounds()
+
+        self._state = ActivityBoard.State.SELECTING
+
+        self._notify_listeners()
+
+    def handle_action(self, action: Union[Action, None]) -> bool:
+        """
+        Advances the finite state machine based on one player action.
+
+        Returns True if the action was handled in the current state and
+        False if it was ignored.
+
+        Arguments:
+        action -- a value from the Action enum (or None, which is ignored)
+        """
+        handled = self._update_state(action)
+
+        if handled:
+            self._notify_listeners()
+
+        return handled
+
+    def _end_game(self, play_again: bool) -> None:
+        """
+        Ends the current game and records the opened activities in the
+        optional history.
+
+        Arguments:
+        play_again -- True if the player wants to play another game
+        """
+        self.play_again = play_again
+        self._state = ActivityBoard.State.GAME_OVER
+
+        if self._history is not None:
+            self._history.record_game(self._opened_activities)
+
+        self._opened_activities = []
+
+    def _update_state(self, action: Union[Action, None]) -> bool:
+        """
+        Performs the state transition for handle_action().
+        """
+        selected_door = self._selected_door
+
+        if self._state is ActivityBoard.State.SELECTING:
+            if action is ActivityBoard.Action.OPEN:
+                if not selected_door.is_open:
+                    self._play_random_sound(self._open_sounds)
+                    self._animate_open(selected_door)
+                    self._show_activity(selected_door)
+
+                    selected_door.is_open = True
+
+                    self._opened_activities.append(
+                        self._door_activities[selected_door.index])
+
+                    self._state = ActivityBoard.State.IN_PROGRESS
+                else:
+                    self._play_random_sound(self._oops_sounds)
+
+                return True
+            elif action is ActivityBoard.Action.RESTART:
+                self._end_game(play_again=True)
+
+                return True
+            elif action is ActivityBoard.Action.QUIT:
+                self._end_game(play_again=False)
+
+                return True
+            elif action is ActivityBoard.Action.REVEAL:
+                self._play_random_sound(self._reveal_all_sounds)
+
+                self._animate_open_all()
+
+                self._state = ActivityBoard.State.ALL_REVEALED
+
+                return True
+            elif action in ActivityBoard.NAVIGATION_ACTIONS:
+                self._move_selection([action])
+
+                return True
+        elif self._state is ActivityBoard.State.IN_PROGRESS:
+            if action is ActivityBoard.Action.RETURN:
+                self._draw_all_doors()
+
+                self._state = ActivityBoard.State.SELECTING
+
+                return True
+        elif self._state is ActivityBoard.State.ALL_REVEALED:
+            if action is ActivityBoard.Action.RESTART:
+                self._end_game(play_again=True)
+
+                return True
+            elif action is ActivityBoard.Action.QUIT:
+                self._end_game(play_again=False)
+
+                return True
+        elif self._state is ActivityBoard.State.GAME_OVER:
+            pass
+        else:
+            raise RuntimeError('Invalid state in main loop')
+
+        return False
+
+    def queue_event(self, event: pygame.event.Event) -> None:
+        """
+        Translates one pygame event into an action and adds it to the
+        board's action queue. The action is handled by run() or
+        handle_next_action().
+
+        Arguments:
+        event -- the pygame event to be translated
+        """
+        source = self._repeat_source(event)
+
+        # Releasing a key or centering the d-pad stops auto-repeat. Moving
+        # the d-pad to a new direction replaces the held direction.
+        if event.type in (KEYUP, JOYHATMOTION):
+            self._repeat.release(source)
+
+        action = self._translate_action(event)
+
+        if action is not None:
+            self._last_input_time = time.monotonic()
+
+            self._input.put(action)
+
+            if (action in ActivityBoard.NAVIGATION_ACTIONS
+                    and source is not None):
+                self._repeat.press(action, source)
+
+    def handle_next_action(self) -> bool:
+        """
+        Handles the oldest action in the board's action queue, if any.
+
+        When the selection is being moved, all consecutive queued movement
+        actions are combined into one move so that the board is redrawn
+        only once per frame.
+
+        Returns True if an action was handled.
+        """
+        # Files are only reloaded between rounds (i.e., not while an
+        # activity is being shown)
+        if (self._watcher is not None
+                and self._state is ActivityBoard.State.SELECTING):
+            self._check_reload()
+
+        self._repeat.poll(self._input)
+        self._poll_back_button()
+
+        action = self._input.get()
+
+        if action is None:
+            return False
+
+        if (self._state is ActivityBoard.State.SELECTING
+                and action in ActivityBoard.NAVIGATION_ACTIONS):
+            actions = [action]
+
+            while self._input.peek() in ActivityBoard.NAVIGATION_ACTIONS:
+                actions.append(self._input.get())
+
+            self._move_selection(actions)
+            self._notify_listeners()
+
+            return True
+
+        return self.handle_action(action)
+
     def run(self) -> bool:
         """
         Runs the activity board for one game.
 
-        This is primarily a finite state machine representing the different 
-        possible states during the game.
+        This drives the finite state machine in start() and handle_action()
+        with actions collected from the pygame event queue. Input received
+        while an animation is running is queued (type-ahead) rather than
+        lost. To run several boards in one event loop, use BoardHost instead.
 
         Returns True if the player wants to play again and False if the
         player wants to quit.
@@ -611,116 +1888,323 @@ class ActivityBoard:
         play again. This is to ensure that configuration and activities
         can be updated between plays if desired.
         """
-        self._state = ActivityBoard.State.START
+        self.start()
 
         while self._state is not ActivityBoard.State.GAME_OVER:
-            if self._state is ActivityBoard.State.START:
-                self._play_random_sound(self._start_sounds)
+            self._pump_input()
 
-                if self._start_hidden:
-                    self._animate_intro()
-                else:
-                    self._draw_all_doors()
-                
-                self._doors[0].is_selected = True
-                self._doors[0].is_updated = True
-                selected_door = self._doors[0]
+            if self.handle_next_action() or self.run_idle_tasks():
+                continue
 
-                self._draw_updated_doors()
+            if self._is_idle_due():
+                self._run_idle()
 
-                self._state = ActivityBoard.State.SELECTING
+        return self.play_again
+
+    def _build_idle_scheduler(self, slice_time: float) -> IdleScheduler:
+        """
+        Builds the scheduler for background work, with tasks in order of
+        how soon their results are likely to be needed: first the selected
+        door, then the doors next to it, then the rest of the doors in the
+        view and finally the surfaces for the endgame reveal.
+
+        Arguments:
+        slice_time -- time in seconds spent on background work each time
+            the main loop finds no input to handle
+        """
+        scheduler = IdleScheduler(slice_time)
+
+        scheduler.add_task('selected door', lambda: self._prepare_surfaces(
+            self._selected_doors(), ('revealed', 'crossed_selected')))
+        scheduler.add_task('transition', self._prepare_transition)
+        scheduler.add_task('selected view', lambda: self._prepare_views_for(
+            self._selected_doors()))
+        scheduler.add_task('neighbour doors', lambda: self._prepare_surfaces(
+            self._neighbour_doors(), ('closed_selected', 'revealed')))
+        scheduler.add_task('neighbour views', lambda: self._prepare_views_for(
+            self._neighbour_doors()))
+
+        # Without a memory budget, views are only kept for the selected door
+        # and its neighbours (see _prepare_views_for())
+        if self._surface_budget is not None:
+            scheduler.add_task(
+                'activity views', lambda: self._prepare_views_for(
+                    [d for d in self._visible_doors() if not d.is_open]))
+
+        scheduler.add_task('reveal', self._prepare_reveal)
+
+        return scheduler
+
+    def _selected_doors(self) -> List[Door]:
+        """
+        Returns a list containing the selected door if it can still be
+        opened, or an empty list.
+        """
+        door = self._selected_door
+
+        if door is None or door.is_open:
+            return []
+
+        return [door]
+
+    def _neighbour_doors(self) -> List[Door]:
+        """
+        Returns the unopened doors in the view next to the selected door.
+        """
+        if self._selected_door is None:
+            return []
+
+        neighbours = []
+
+        for index in self._layout.neighbours[self._selected_door.index]:
+            door = self._doors[index]
 
-                pygame.event.clear()
-            elif self._state is ActivityBoard.State.SELECTING:
-                for event in pygame.event.get():
-                    action = self._translate_action(event)
-
-                    if action is ActivityBoard.Action.OPEN:
-                        if not selected_door.is_open:
-                            self._play_random_sound(self._open_sounds)
-                            self._animate_open(selected_door)
-                            self._show_activity(selected_door)
-
-                            selected_door.is_open = True
-
-                            self._state = ActivityBoard.State.IN_PROGRESS
-                        else:
-                            self._play_random_sound(self._oops_sounds)
-
-                        pygame.event.clear()
-                    elif action is ActivityBoard.Action.RESTART:
-                        play_again = True
-                        self._state = ActivityBoard.State.GAME_OVER
-
-                        pygame.event.clear()
-                    elif action is ActivityBoard.Action.QUIT:
-                        play_again = False
-                        self._state = ActivityBoard.State.GAME_OVER
-
-                        pygame.event.clear()
-                    elif action is ActivityBoard.Action.REVEAL:
-                        self._play_random_sound(self._reveal_all_sounds)
-                        
-                        self._animate_open_all()
-
-                        self._state = ActivityBoard.State.ALL_REVEALED
-
-                        pygame.event.clear()
-                    elif action in [
-                            ActivityBoard.Action.UP,
-                            ActivityBoard.Action.DOWN,
-                            ActivityBoard.Action.LEFT,
-                            ActivityBoard.Action.RIGHT
-                    ]:
-                        new_index = self._get_new_selection(
-                            selected_door, action)
-
-                        if new_index != selected_door.index:
-                            selected_door.is_selected = False
-                            selected_door.is_updated = True
-
-                            self._doors[new_index].is_selected = True
-                            self._doors[new_index].is_updated = True
-
-                            selected_door = self._doors[new_index]
-
-                            self._play_random_sound(self._move_sounds)
-
-                            self._draw_updated_doors()
-                        
-                        pygame.event.clear()
-            elif self._state is ActivityBoard.State.IN_PROGRESS:
-                for event in pygame.event.get():
-                    action = self._translate_action(event)
-
-                    if action is ActivityBoard.Action.RETURN:
-                        self._draw_all_doors()
-
-                        self._state = ActivityBoard.State.SELECTING
-
-                        pygame.event.clear()
-            elif self._state is ActivityBoard.State.ALL_REVEALED:
-                 for event in pygame.event.get():
-                    action = self._translate_action(event)
-
-                    if action is ActivityBoard.Action.RESTART:
-                        play_again = True
-                        self._state = ActivityBoard.State.GAME_OVER
-
-                        pygame.event.clear()
-                    elif action is ActivityBoard.Action.QUIT:
-                        play_again = False
-                        self._state = ActivityBoard.State.GAME_OVER
-
-                        pygame.event.clear()
-            elif self._state is ActivityBoard.State.GAME_OVER:
-                pass
+            if (door is not self._selected_door and not door.is_open
+                    and door not in neighbours
+                    and self._is_door_visible(index)):
+                neighbours.append(door)
+
+        return neighbours
+
+    def _door_fits_budget(self, door: Door) -> bool:
+        """
+        Returns True if another surface for the door can be cached without
+        evicting other cached surfaces. Like activity views, door surfaces
+        rendered ahead of time never evict anything.
+        """
+        if self._surface_budget is None:
+            return True
+
+        return self._surface_budget.can_fit(
+            door.width * door.height * self._bytes_per_pixel)
+
+    def _prepare_surfaces(
+            self, doors: List[Door], keys: Tuple[str, ...]) -> bool:
+        """
+        Renders one missing cached surface for the doors.
+
+        Returns True if a surface was rendered.
+        """
+        if not self._prepare_doors:
+            return False
+
+        for door in doors:
+            for key in keys:
+                if door.has_cached_surface(key):
+                    continue
+
+                if not self._door_fits_budget(door):
+                    return False
+
+                door.get_cached_surface(key)
+
+                return True
+
+        return False
+
+    def _prepare_transition(self) -> bool:
+        """
+        Builds the transition effect for opening the selected door.
+
+        Returns True if a transition was built.
+        """
+        if not self._prepare_doors or self._transition_effect == 'reveal':
+            return False
+
+        doors = self._selected_doors()
+
+        if not doors:
+            return False
+
+        door = doors[0]
+
+        # Surfaces are rendered by the selected door task, within the
+        # memory budget
+        if not (door.has_cached_surface('revealed')
+                and door.has_cached_surface('closed_selected')):
+            return False
+
+        before, after = self._transition_surfaces(door)
+
+        prepared = self._next_transition
+
+        if (prepared is not None and prepared[0] is door
+                and prepared[1] is before and prepared[2] is after):
+            return False
+
+        self._next_transition = (
+            door, before, after,
+            DoorTransition(self._transition_effect, before, after))
+
+        return True
+
+    def _prepare_views_for(self, doors: List[Door]) -> bool:
+        """
+        Renders one missing full-screen activity view for the doors.
+
+        Returns True if a view was rendered.
+        """
+        if not self._prepare_views:
+            return False
+
+        if self._surface_budget is None:
+            # Each view is a full-screen surface, so without a memory
+            # budget only the views that are likely to be needed next are
+            # kept
+            self._activity_views.retain(
+                self._selected_doors() + self._neighbour_doors())
+
+        # Stops by itself when the memory budget is full
+        return self._activity_views.prepare(doors)
+
+    def _prepare_reveal(self) -> bool:
+        """
+        Renders one missing surface needed for the endgame reveal of the
+        doors in the view.
+
+        Returns True if a surface was rendered.
+        """
+        for door in self._visible_doors():
+            if door.is_open:
+                keys = ('revealed',)
             else:
-                raise RuntimeError('Invalid state in main loop')
+                keys = ('revealed', 'unused')
+
+            if self._prepare_surfaces([door], keys):
+                return True
+
+        return False
+
+    def run_idle_tasks(self) -> bool:
+        """
+        Does background work (e.g., rendering the surfaces needed to open
+        the selected door) for up to one time slice while the board is
+        waiting for the player. Called by the main loop when there is no
+        input to handle, so input is checked again after every slice.
+
+        Returns True if any work was done, or False if there is nothing
+        left to do.
+        """
+        if self._state not in ActivityBoard.BACKGROUND_WORK_STATES:
+            return False
+
+        return self._idle_scheduler.run()
+
+    def _is_idle_due(self) -> bool:
+        """
+        Returns True if idle mode is enabled and there has been no input for
+        the configured time while the board is waiting for the player.
+        """
+        return (self._idle_timeout is not None
+            and self._back_pressed_time is None
+            and self._state in ActivityBoard.IDLE_STATES
+            and time.monotonic() - self._last_input_time
+                >= self._idle_timeout)
+
+    def _run_idle(self) -> None:
+        """
+        Dims or blanks the board (or runs the attract animation) and sleeps
+        until there is input.
+
+        The loop blocks in pygame.event.wait() and is only woken by input
+        or by a timer at the idle tick rate, so almost no CPU time is used.
+        The input that wakes the board is not handled as an action (e.g.,
+        pressing the open button wakes the board without opening a door),
+        except for quitting. Pressing the Back button wakes the board so
+        that holding it can still quit.
+        """
+        # The release of a held key or d-pad direction is swallowed below,
+        # so it must not keep repeating after the board wakes up
+        self._repeat.release_all()
+
+        self._draw_idle_screen()
+
+        # A timer interval of 0 would turn the timer off
+        pygame.time.set_timer(
+            ActivityBoard.IDLE_TICK_EVENT,
+            max(1, int(1000 / self._idle_tick_rate)))
+
+        attract_door = None
+
+        try:
+            while True:
+                event = pygame.event.wait()
+
+                if event.type == ActivityBoard.IDLE_TICK_EVENT:
+                    if self._idle_mode == 'attract':
+                        attract_door = self._attract_step(attract_door)
+
+                    continue
+
+                action = self._translate_action(event)
+
+                if action is ActivityBoard.Action.QUIT:
+                    self._input.put(action)
+
+                if (action is not None
+                        or self._back_pressed_time is not None):
+                    break
+        finally:
+            pygame.time.set_timer(ActivityBoard.IDLE_TICK_EVENT, 0)
+
+        self._last_input_time = time.monotonic()
+
+        self._draw_all_doors()
+
+    def _draw_idle_screen(self) -> None:
+        """Draws the first frame of idle mode."""
+        if (self._idle_mode == 'blank'
+                or (self._idle_mode == 'attract'
+                    and self._state is not ActivityBoard.State.SELECTING)):
+            # The attract animation would give away the revealed activities,
+            # so a revealed board is blanked instead
+            self._surface.fill(self._bg_color)
+        elif self._idle_mode == 'dim':
+            overlay = pygame.Surface(self._surface.get_size())
+            overlay.fill(pygame.Color('black'))
+            overlay.set_alpha(int(255 * (1 - self._idle_dim_level)))
+
+            self._surface.blit(overlay, (0, 0))
+
+        self._mark_dirty()
+
+        if self._surface_is_display:
+            self._update_display()
+
+    def _attract_step(self, previous: Union[Door, None]) -> Union[Door, None]:
+        """
+        Moves the attract animation one step by highlighting a random
+        unopened door using the cached door surfaces.
+
+        Returns the highlighted door (or None if there is none), which must
+        be passed in as previous on the next step.
+
+        Arguments:
+        previous -- door highlighted by the last step (drawn normally again)
+        """
+        if self._state is not ActivityBoard.State.SELECTING:
+            return None
+
+        if previous is not None:
+            self._draw_door(previous, update_display=False)
+
+        candidates = [d for d in self._visible_doors()
+            if not d.is_open and d is not previous]
+
+        door = random.choice(candidates) if candidates else None
+
+        if door is not None:
+            x, y = self._door_position(door.index)
+
+            self._surface.blit(
+                door.get_cached_surface('closed_selected'), (x, y))
+            self._mark_dirty(pygame.Rect(x, y, door.width, door.height))
+
+        if self._surface_is_display:
+            self._update_display()
 
-        return play_again
+        return door
 
 
 if __name__ == '__main__':
     print('This file should not be run directly. Run main.py instead.')
-    
\ No newline at end of file
@@ -0,0 +1,314 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Weighted activity sampling with an alias table and recent-game history
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import json
+import os
+import random
+import threading
+
+from typing import Callable, Dict, Iterable, List, Union
+
+
+class ActivitySampler:
+    """
+    Class representing a weighted random sampler for a list of activities.
+
+    An alias table (Vose's method) is built once when the sampler is
+    created, so each draw takes constant time regardless of the number of
+    activities or their weights. Activities are drawn without replacement
+    by redrawing when an activity was already chosen.
+
+    Properties:
+    weights -- relative weight of each activity (0 means never chosen
+        while other activities are available)
+    """
+
+    # Redraws before falling back to a linear scan of the remaining
+    # activities (only happens when most activities are already used)
+    MAX_DRAWS = 32
+
+    def __init__(self, weights: List[float]) -> None:
+        if any(w < 0 for w in weights):
+            raise RuntimeError('Activity weights cannot be negative')
+
+        self.weights = list(weights)
+
+        self._prob, self._alias = self._build_table(self.weights)
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def _build_table(self, weights: List[float]) -> tuple:
+        """
+        Builds the probability and alias lists for the alias method.
+        """
+        n = len(weights)
+        total = sum(weights)
+
+        if n == 0 or total == 0:
+            # Uniform table - every activity has weight 0
+            return [1.0] * n, list(range(n))
+
+        scaled = [w * n / total for w in weights]
+
+        prob = [0.0] * n
+        alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+
+            prob[s] = scaled[s]
+            alias[s] = l
+
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+
+            if scaled[l] < 1.0:
+                small.append(l)
+            else:
+                large.append(l)
+
+        # Anything left over is 1.0 apart from rounding errors
+        for i in small + large:
+            prob[i] = 1.0
+
+        return prob, alias
+
+    def draw(self) -> int:
+        """Returns the index of one activity (with replacement)."""
+        i = random.randrange(len(self._prob))
+
+        if random.random() < self._prob[i]:
+            return i
+
+        return self._alias[i]
+
+    def sample(
+            self, count: int,
+            acceptance: Union[Callable[[int], float], None] = None,
+            exclude: Union[Iterable[int], None] = None
+            ) -> List[int]:
+        """
+        Returns the indexes of count different activities.
+
+        Arguments:
+        count -- number of activities to choose
+        acceptance -- function returning a factor from 0 to 1 for an
+            activity index that is multiplied with the weight of the
+            activity (e.g., to make recently used activities less likely)
+            (optional)
+        exclude -- indexes of activities that must not be chosen (e.g.,
+            because they are already behind another door) (optional)
+        """
+        used = set(exclude) if exclude is not None else set()
+
+        available = len(self.weights) - len(used)
+
+        if count > available:
+            raise RuntimeError(
+                f'Not enough activities for {count} doors '
+                f'({available} available)')
+
+        chosen = []
+
+        for _ in range(count):
+            index = None
+
+            for _ in range(ActivitySampler.MAX_DRAWS):
+                candidate = self.draw()
+
+                if candidate in used:
+                    continue
+
+                if (acceptance is None
+                        or random.random() < acceptance(candidate)):
+                    index = candidate
+                    break
+
+            if index is None:
+                index = self._choose_remaining(used, acceptance)
+
+            chosen.append(index)
+            used.add(index)
+
+        return chosen
+
+    def _choose_remaining(
+            self, used: set,
+            acceptance: Union[Callable[[int], float], None]) -> int:
+        """
+        Chooses one of the activities that are not used yet by scanning
+        all of them.
+        """
+        remaining = [i for i in range(len(self.weights)) if i not in used]
+
+        weights = [self.weights[i] * (acceptance(i) if acceptance else 1.0)
+            for i in remaining]
+
+        if sum(weights) == 0:
+            return random.choice(remaining)
+
+        return random.choices(remaining, weights)[0]
+
+
+class ActivityHistory:
+    """
+    Class representing the activities that were opened in recent games,
+    stored in a JSON file so that it is kept when the program is restarted.
+
+    An activity opened in the last game has its weight multiplied by
+    penalty. The factor rises in equal steps for older games until the
+    activity is no longer in the history.
+
+    The file is written by a background thread so that the end of a game
+    never waits for the disk. The thread is not a daemon, so the last
+    game is still saved when the program exits straight afterwards.
+
+    Properties:
+    file -- path of the JSON file
+    games -- number of games to remember
+    penalty -- weight factor (0 to 1) for activities opened in the last game
+    """
+
+    def __init__(
+            self, file: str, games: int = 5, penalty: float = 0.25) -> None:
+        if not 0 <= penalty <= 1:
+            raise RuntimeError('Activity history penalty must be 0 to 1')
+
+        self.file = file
+        self.games = games
+        self.penalty = penalty
+
+        self._games = self._load()
+        self._factors = self._build_factors()
+
+        # History waiting to be written and whether the writer thread is
+        # running - shared with the writer thread
+        self._pending = None
+        self._writing = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> List[List[str]]:
+        """Reads the history file (most recent game first)."""
+        if not os.path.exists(self.file):
+            return []
+
+        try:
+            with open(self.file, 'r') as f:
+                games = json.load(f)['games']
+        except (OSError, ValueError, KeyError, TypeError):
+            # Start over rather than refuse to run
+            return []
+
+        return games[:self.games]
+
+    def _build_factors(self) -> Dict[str, float]:
+        """
+        Builds a dictionary of weight factors for the activities in the
+        history.
+        """
+        factors = {}
+
+        # Iterate from the oldest game so that recent games take priority
+        for age in range(len(self._games) - 1, -1, -1):
+            factor = (self.penalty
+                + (1.0 - self.penalty) * age / self.games)
+
+            for activity in self._games[age]:
+                factors[activity] = factor
+
+        return factors
+
+    def factor(self, activity: str) -> float:
+        """Returns the weight factor for an activity."""
+        return self._factors.get(activity, 1.0)
+
+    def record_game(self, activities: List[str]) -> None:
+        """
+        Adds the activities opened in one game to the history and saves the
+        history file.
+
+        Arguments:
+        activities -- activities (as read from the activity file, before
+            choosing varied repetitions) that were opened
+        """
+        self._games = ([list(activities)] + self._games)[:self.games]
+        self._factors = self._build_factors()
+
+        with self._lock:
+            # Only the newest history is written if a write is in progress
+            self._pending = json.dumps({'games': self._games})
+
+            if self._writing:
+                return
+
+            self._writing = True
+
+        threading.Thread(
+            target=self._run, name='history-writer').start()
+
+    def _run(self) -> None:
+        """Main function of the writer thread."""
+        while True:
+            with self._lock:
+                data = self._pending
+                self._pending = None
+
+                if data is None:
+                    self._writing = False
+                    return
+
+            try:
+                self._write(data)
+            except OSError as e:
+                # The history is a convenience - never stop the game
+                print(f'Unable to write activity history: {e}')
+
+    def _write(self, data: str) -> None:
+        """Writes the history file. Called from the writer thread."""
+        # Write to a temporary file first so that a power failure cannot
+        # leave a partial history behind
+        temp_file = self.file + '.tmp'
+
+        with open(temp_file, 'w') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_file, self.file)
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
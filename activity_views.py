@@ -0,0 +1,352 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Cache of full-screen activity views
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import time
+
+from typing import Dict, Hashable, Iterable, Iterator, List, Tuple, Union
+
+import pygame
+
+from door import Door
+from memory_budget import SurfaceBudget, surface_bytes
+from text_renderer import TextRenderer
+
+
+class ActivityViewCache:
+    """
+    Class that renders and caches the full-screen view of the activity
+    behind each door, so that showing an activity is a single blit.
+
+    Views are rendered ahead of time with prepare() (e.g., during the intro
+    animation or while waiting for input) in small steps: the background
+    first and then one line of text per step, so that no step takes long
+    enough to delay the response to input. Views rendered ahead of time
+    never evict other cached surfaces from the budget, since an evicted
+    view would otherwise be rendered again straight away, forever. Each
+    view remembers the activity text it was rendered for, so a door that
+    gets a new activity (e.g., after reshuffle() or hot reload) is
+    rendered again when needed.
+
+    Allocating a full-screen surface takes longer than a whole step, so
+    prepare() never allocates: it only draws into spare surfaces that were
+    allocated at startup with reserve() or left over from discarded views.
+    Spare surfaces count towards the memory budget.
+
+    Properties:
+    renderer -- TextRenderer used to render the activity text
+    size -- (width, height) of the views
+    bg_color -- pygame Color object representing the background color
+    depth -- color depth in bits per pixel of the views (0 for the default
+        depth)
+    budget -- SurfaceBudget that limits the memory used by cached surfaces
+        (optional)
+    """
+
+    def __init__(
+            self, renderer: TextRenderer, size: Tuple[int, int],
+            bg_color: pygame.Color, depth: int = 0,
+            budget: Union[SurfaceBudget, None] = None) -> None:
+        self.renderer = renderer
+        self.size = size
+        self.bg_color = bg_color
+        self.depth = depth
+        self.budget = budget
+
+        # Door index -> (activity text, surface)
+        self._views: Dict[int, Tuple[str, pygame.Surface]] = {}
+
+        # View being rendered by prepare(), as a tuple of the door index,
+        # the activity text, the surface and the generator that draws the
+        # remaining lines, or None
+        self._rendering: Union[
+            Tuple[int, str, pygame.Surface, Iterator[pygame.Rect]],
+            None] = None
+
+        # Surfaces that are reused for new views, and how many are kept
+        self._spares: List[pygame.Surface] = []
+        self._max_spares = 0
+
+    def reserve(self, count: int) -> None:
+        """
+        Allocates spare surfaces until there are surfaces for count views
+        or no more fit in the memory budget, and keeps up to count spare
+        surfaces from then on. Called at startup, so that prepare() has
+        surfaces to draw into.
+        """
+        self._max_spares = count
+
+        while (len(self._views) + len(self._spares)
+                + (self._rendering is not None) < count):
+            spares = len(self._spares)
+
+            self._keep_spare(self._allocate())
+
+            if len(self._spares) == spares:
+                # No room left in the budget
+                break
+
+    def clear_cache(
+            self, keys: Union[Iterable[Hashable], None] = None) -> None:
+        """
+        Discards cached views. Their surfaces are kept as spares.
+
+        Arguments:
+        keys -- indexes of the doors whose views are discarded (default is
+            all views)
+        """
+        if keys is None:
+            keys = list(self._views)
+
+            if self._rendering is not None:
+                keys.append(self._rendering[0])
+
+        for key in keys:
+            if isinstance(key, tuple):
+                # Spare surface evicted by the budget
+                self._spares = [s for s in self._spares
+                    if ActivityViewCache._spare_key(s) != key]
+                continue
+
+            surfaces = []
+
+            if self._rendering is not None and self._rendering[0] == key:
+                surfaces.append(self._rendering[2])
+                self._rendering = None
+
+            view = self._views.pop(key, None)
+
+            if view is not None:
+                surfaces.append(view[1])
+
+            if surfaces and self.budget is not None:
+                self.budget.remove(self, key)
+
+            for surf in surfaces:
+                self._keep_spare(surf)
+
+    @staticmethod
+    def _spare_key(surf: pygame.Surface) -> Tuple[str, int]:
+        """Returns the budget key of a spare surface."""
+        return ('spare', id(surf))
+
+    def _keep_spare(self, surf: pygame.Surface) -> None:
+        """
+        Keeps a surface that is no longer used as a spare, unless there are
+        enough spares or it does not fit in the budget without evicting
+        anything.
+        """
+        if len(self._spares) >= self._max_spares:
+            return
+
+        if self.budget is not None:
+            if not self.budget.can_fit(surface_bytes(surf)):
+                return
+
+            self.budget.add(self, ActivityViewCache._spare_key(surf), surf)
+
+        self._spares.append(surf)
+
+    def _take_spare(self) -> Union[pygame.Surface, None]:
+        """Returns a spare surface, or None if there is none."""
+        if not self._spares:
+            return None
+
+        surf = self._spares.pop()
+
+        if self.budget is not None:
+            self.budget.remove(self, ActivityViewCache._spare_key(surf))
+
+        return surf
+
+    def retain(self, doors: Iterable[Door]) -> None:
+        """Discards the cached views of all doors except the given doors."""
+        keep = {d.index for d in doors}
+
+        self.clear_cache([key for key in self._views if key not in keep])
+
+    def has_view(self, door: Door) -> bool:
+        """Returns True if an up-to-date view of the door is cached."""
+        view = self._views.get(door.index)
+
+        return view is not None and view[0] == door.activity
+
+    def get_view(self, door: Door) -> pygame.Surface:
+        """
+        Returns the view of the activity behind a door, rendering it first
+        if necessary.
+
+        The returned surface is shared and must not be modified.
+        """
+        if not self.has_view(door):
+            if self._is_rendering(door):
+                # Finish the view that prepare() started
+                for _ in self._rendering[3]:
+                    pass
+
+                surf = self._rendering[2]
+                self._rendering = None
+            else:
+                self.clear_cache((door.index,))
+
+                surf = self.render_view(door.activity)
+
+            self._store(door, surf)
+        elif self.budget is not None:
+            self.budget.touch(self, door.index)
+
+        return self._views[door.index][1]
+
+    def render_view(self, activity: str) -> pygame.Surface:
+        """Renders the full-screen view of an activity without caching."""
+        surf = self._new_view()
+
+        self.renderer.render_to(
+            surf, (self.size[0] // 2, self.size[1] // 2), activity)
+
+        return surf
+
+    def _allocate(self) -> pygame.Surface:
+        """Allocates a surface for one view."""
+        if self.depth:
+            return pygame.Surface(self.size, 0, self.depth)
+
+        return pygame.Surface(self.size)
+
+    def _new_view(self) -> pygame.Surface:
+        """
+        Returns a view surface filled with the background color, reusing a
+        spare surface if there is one.
+        """
+        surf = self._take_spare()
+
+        if surf is None:
+            surf = self._allocate()
+
+        surf.fill(self.bg_color)
+
+        return surf
+
+    def _is_rendering(self, door: Door) -> bool:
+        """
+        Returns True if prepare() has started rendering the current view of
+        the door.
+        """
+        return (self._rendering is not None
+            and self._rendering[0] == door.index
+            and self._rendering[1] == door.activity)
+
+    def _render_step(self, door: Door) -> None:
+        """
+        Does one step of rendering the view of a door: fills a spare
+        surface with the background, draws one line of text or stores the
+        finished view.
+        """
+        if not self._is_rendering(door):
+            surf = self._new_view()
+
+            # Takes the place of the spare in the budget
+            if self.budget is not None:
+                self.budget.add(self, door.index, surf)
+
+            lines = self.renderer.render_lines_to(
+                surf, (self.size[0] // 2, self.size[1] // 2), door.activity)
+
+            self._rendering = (door.index, door.activity, surf, lines)
+        elif next(self._rendering[3], None) is None:
+            surf = self._rendering[2]
+            self._rendering = None
+
+            self._store(door, surf)
+
+    def _store(self, door: Door, surf: pygame.Surface) -> None:
+        """Stores a rendered view in the cache."""
+        self._views[door.index] = (door.activity, surf)
+
+        if self.budget is not None:
+            self.budget.add(self, door.index, surf)
+
+    def prepare(
+            self, doors: List[Door],
+            deadline: Union[float, None] = None) -> bool:
+        """
+        Renders views for doors that do not have one, one step at a time,
+        until all views are ready, the deadline has passed or there are no
+        spare surfaces left.
+
+        Returns True if any rendering was done.
+
+        Arguments:
+        doors -- doors whose views are needed (e.g., the unopened doors)
+        deadline -- time.monotonic() value after which no more steps are
+            started (optional - if None, exactly one step is done)
+        """
+        rendered = False
+
+        for door in doors:
+            while not self.has_view(door):
+                if deadline is None:
+                    if rendered:
+                        return True
+                elif time.monotonic() >= deadline:
+                    return rendered
+
+                if not self._is_rendering(door):
+                    # A view of an old activity or a view that was started
+                    # for another door is dropped and its surface reused
+                    self.clear_cache((door.index,))
+
+                    if self._rendering is not None:
+                        self.clear_cache((self._rendering[0],))
+
+                    if not self._spares:
+                        return rendered
+
+                self._render_step(door)
+
+                rendered = True
+
+        return rendered
+
+    def cached_bytes(self) -> int:
+        """
+        Returns the total size of the cached views, including the view
+        being rendered and the spare surfaces.
+        """
+        surfaces = [s for _, s in self._views.values()] + self._spares
+
+        if self._rendering is not None:
+            surfaces.append(self._rendering[2])
+
+        return sum(surface_bytes(s) for s in surfaces)
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
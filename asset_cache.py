@@ -0,0 +1,112 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Asset cache shared between activity boards
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import os
+
+from typing import Dict, Tuple, Union
+
+import pygame
+import pygame.freetype
+
+from sound_bank import SoundBank
+
+
+class AssetCache:
+    """
+    Class to load fonts and sounds once and share them between any number
+    of ActivityBoard objects (e.g., several boards running in one process
+    or a new board created when the game is restarted).
+
+    Assets are keyed by file name (and size for fonts) and are never
+    unloaded while the cache exists.
+
+    Properties:
+    sound_bank -- SoundBank object to take sounds from instead of loading
+        the sound files (optional - sounds that are not in the bank are
+        loaded from their files)
+    """
+
+    def __init__(self, sound_bank: Union[SoundBank, None] = None) -> None:
+        self.sound_bank = sound_bank
+
+        self._fonts: Dict[
+            Tuple[str, int, str],
+            Union[pygame.font.Font, pygame.freetype.Font]] = {}
+        self._sounds: Dict[str, pygame.mixer.Sound] = {}
+
+    def get_font(
+            self, file_name: str, size: int,
+            backend: str = 'font') -> Union[
+                pygame.font.Font, pygame.freetype.Font]:
+        """
+        Returns a font object for the specified font file and size,
+        loading it only the first time it is requested.
+
+        Arguments:
+        file_name -- name of the font file
+        size -- font size
+        backend -- 'font' for a pygame.font.Font object or 'freetype' for
+            a pygame.freetype.Font object
+        """
+        key = (file_name, size, backend)
+
+        if key not in self._fonts:
+            if backend == 'freetype':
+                if (file_name == pygame.font.get_default_font()
+                        and not os.path.exists(file_name)):
+                    # pygame.font finds its bundled default font by name,
+                    # but pygame.freetype only does so when given None
+                    file_name = None
+
+                self._fonts[key] = pygame.freetype.Font(file_name, size)
+            else:
+                self._fonts[key] = pygame.font.Font(file_name, size)
+
+        return self._fonts[key]
+
+    def get_sound(self, file_name: str) -> pygame.mixer.Sound:
+        """
+        Returns a pygame Sound object for the specified sound file, loading
+        it only the first time it is requested.
+        """
+        if file_name not in self._sounds:
+            if self.sound_bank is not None and file_name in self.sound_bank:
+                self._sounds[file_name] = self.sound_bank.get_sound(
+                    file_name)
+            else:
+                self._sounds[file_name] = pygame.mixer.Sound(file_name)
+
+        return self._sounds[file_name]
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
@@ -0,0 +1,259 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+BoardHost class for running several boards in one process
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import copy
+
+from typing import TYPE_CHECKING, List, Union
+
+import pygame
+
+# Wildcard import used here based on standard pygame code style
+from pygame.locals import *
+
+from activity_board import ActivityBoard
+from asset_cache import AssetCache
+
+# Only needed for type hints - these modules are imported by main.py when
+# their feature is enabled
+if TYPE_CHECKING:
+    from board_mirror import BoardMirror
+    from framebuffer_output import FramebufferOutput
+    from remote_control import RemoteControlServer
+    from session_log import SessionLogger
+
+
+class BoardHost:
+    """
+    Class that runs several activity boards on one surface with a single
+    event loop and a single shared AssetCache.
+
+    Each entry in the "boards" list of the configuration describes one board:
+
+    rect -- [x, y, width, height] of the region of the surface used by the
+        board
+    joystick -- index of the joystick that controls the board (optional)
+    keyboard -- boolean that determines whether keyboard input is sent to
+        the board (optional - defaults to True for the first board only)
+    config -- dictionary of configuration values that override the main
+        configuration for this board (optional, e.g., a different
+        activity_file or door colors for each team)
+
+    Properties:
+    surface -- the pygame surface containing all boards
+    config -- dictionary representing the activity board configuration
+    start_hidden -- passed to each ActivityBoard
+    surface_is_display -- passed to each ActivityBoard
+    remote -- RemoteControlServer to attach to each board (optional)
+    session_log -- SessionLogger to attach to each board (optional)
+    mirror -- BoardMirror to attach to each board (optional)
+    framebuffer -- FramebufferOutput to attach to each board (optional)
+    assets -- AssetCache shared by all boards (optional - a new one is
+        created if not specified)
+    """
+
+    def __init__(
+            self, surface: pygame.Surface, config: dict,
+            start_hidden: bool = False,
+            surface_is_display: bool = True,
+            remote: Union['RemoteControlServer', None] = None,
+            session_log: Union['SessionLogger', None] = None,
+            mirror: Union['BoardMirror', None] = None,
+            framebuffer: Union['FramebufferOutput', None] = None,
+            assets: Union[AssetCache, None] = None) -> None:
+        self._surface = surface
+        self._config = config
+
+        self._start_hidden = start_hidden
+        self._surface_is_display = surface_is_display
+
+        self._remote = remote
+        self._session_log = session_log
+        self._mirror = mirror
+        self._framebuffer = framebuffer
+
+        # Functions registered with add_listener(), which are also added to
+        # boards created when a board is restarted
+        self._listeners = []
+
+        if assets is None:
+            assets = AssetCache()
+
+        self._assets = assets
+
+        self._board_specs = config['boards']
+        self._boards = [self._build_board(i) for i in range(
+            len(self._board_specs))]
+
+    @property
+    def boards(self) -> List[ActivityBoard]:
+        """Returns the list of boards that are currently running."""
+        return list(self._boards)
+
+    def add_listener(self, listener) -> None:
+        """
+        Registers a function to be called (with the board as the only
+        argument) whenever the state of any board changes.
+        """
+        self._listeners.append(listener)
+
+        for board in self._boards:
+            board.add_listener(listener)
+
+    def _merge_config(self, base: dict, overrides: dict) -> dict:
+        """
+        Returns a copy of the base configuration with values from overrides
+        merged in recursively.
+        """
+        merged = copy.deepcopy(base)
+
+        for key, value in overrides.items():
+            if isinstance(value, dict) and isinstance(merged.get(key), dict):
+                merged[key] = self._merge_config(merged[key], value)
+            else:
+                merged[key] = copy.deepcopy(value)
+
+        return merged
+
+    def _build_board(self, index: int) -> ActivityBoard:
+        """
+        Builds the ActivityBoard described by one entry in the boards list.
+        """
+        spec = self._board_specs[index]
+
+        board_config = self._merge_config(
+            self._config, spec.get('config', {}))
+
+        board = ActivityBoard(
+            surface=self._surface.subsurface(pygame.Rect(spec['rect'])),
+            config=board_config,
+            start_hidden=self._start_hidden,
+            surface_is_display=self._surface_is_display,
+            assets=self._assets,
+            joystick_id=spec.get('joystick', index),
+            input_pump=self._pump_input)
+
+        if self._remote is not None:
+            self._remote.attach(board, index)
+
+        if self._session_log is not None:
+            self._session_log.attach(board, index)
+
+        if self._mirror is not None:
+            self._mirror.attach(board)
+
+        if self._framebuffer is not None:
+            self._framebuffer.attach(board)
+
+        for listener in self._listeners:
+            board.add_listener(listener)
+
+        return board
+
+    def _boards_for_event(self, event: pygame.event.Event) -> List[int]:
+        """
+        Returns list of indexes of the boards that should receive the event.
+
+        Joystick events go to the board using that joystick, keyboard
+        events go to every board with keyboard input enabled and injected
+        actions go to the board given in the event.
+        """
+        if event.type == ActivityBoard.ACTION_EVENT:
+            board = getattr(event, 'board', 0)
+
+            if 0 <= board < len(self._boards):
+                return [board]
+        elif event.type in (JOYBUTTONDOWN, JOYBUTTONUP, JOYHATMOTION):
+            joystick_id = ActivityBoard.event_joystick_id(event)
+
+            return [i for i, b in enumerate(self._boards)
+                if b.joystick_id is not None and b.joystick_id == joystick_id]
+        elif event.type in (KEYDOWN, KEYUP):
+            return [i for i, spec in enumerate(self._board_specs)
+                if spec.get('keyboard', i == 0)]
+
+        return []
+
+    def _pump_input(self) -> None:
+        """
+        Reads the pygame event queue and adds each event to the action
+        queues of the boards that should receive it.
+
+        Boards call this while their animations are running, so input for
+        the other boards is queued rather than lost.
+        """
+        for event in pygame.event.get():
+            for i in self._boards_for_event(event):
+                self._boards[i].queue_event(event)
+
+    def run(self) -> None:
+        """
+        Runs all boards until a player on any board quits.
+
+        A board that is restarted is reshuffled in place without affecting
+        the other boards.
+        """
+        for b in self._boards:
+            b.start()
+
+        running = True
+
+        while running:
+            self._pump_input()
+
+            idle = True
+
+            for i, board in enumerate(self._boards):
+                if board.handle_next_action():
+                    idle = False
+
+                if board.state is ActivityBoard.State.GAME_OVER:
+                    if board.play_again:
+                        if board.can_reshuffle():
+                            board.reshuffle()
+                        else:
+                            self._boards[i] = self._build_board(i)
+
+                        self._boards[i].start()
+                    else:
+                        running = False
+                        break
+
+            # Do background work for one board at a time when no board has
+            # input to handle
+            if running and idle:
+                for board in self._boards:
+                    if board.run_idle_tasks():
+                        break
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
@@ -0,0 +1,536 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Live mirror of the board served over HTTP as MJPEG or PNG deltas
+
+Endpoints:
+
+/ -- web page showing the board (uses /frame.png and /delta)
+/stream.mjpg -- MJPEG stream (e.g., for VLC or an <img> tag)
+/frame.png -- PNG of the whole board
+/delta?seq=<n> -- JSON with the regions that changed after frame <n>
+    (waits up to LONG_POLL seconds for a change) as
+    {"seq": <latest frame>, "patches": [{"x": .., "y": .., "png": <base64>}]}
+    or {"seq": <latest frame>, "full": true} if <n> is too old
+
+Requires pygame 2 (to encode PNG and JPEG images in memory).
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import base64
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+import pygame
+
+from activity_board import ActivityBoard
+
+
+VIEWER_PAGE = b'''<!DOCTYPE html>
+<html>
+<head><title>Activity Board</title>
+<style>body{margin:0;background:#000}canvas{width:100%}</style></head>
+<body><canvas id="board"></canvas>
+<script>
+const canvas = document.getElementById('board');
+const ctx = canvas.getContext('2d');
+let seq = -1;
+function draw(src, x, y) {
+  return new Promise(resolve => {
+    const img = new Image();
+    img.onload = () => { ctx.drawImage(img, x, y); resolve(); };
+    img.src = src;
+  });
+}
+async function loadFrame() {
+  const response = await fetch('/frame.png');
+  seq = parseInt(response.headers.get('X-Frame-Seq'));
+  const blob = await response.blob();
+  const bitmap = await createImageBitmap(blob);
+  canvas.width = bitmap.width;
+  canvas.height = bitmap.height;
+  ctx.drawImage(bitmap, 0, 0);
+}
+async function poll() {
+  await loadFrame();
+  while (true) {
+    try {
+      const delta = await (await fetch('/delta?seq=' + seq)).json();
+      if (delta.full) {
+        await loadFrame();
+        continue;
+      }
+      for (const p of delta.patches) {
+        await draw('data:image/png;base64,' + p.png, p.x, p.y);
+      }
+      seq = delta.seq;
+    } catch (e) {
+      await new Promise(r => setTimeout(r, 1000));
+      await loadFrame();
+    }
+  }
+}
+poll();
+</script>
+</body>
+</html>
+'''
+
+
+# Pixel format used to send images to the encoder process
+PIXEL_FORMAT = 'RGB'
+
+
+def _encode_image(surf: pygame.Surface, name_hint: str) -> bytes:
+    """Encodes a surface as PNG or JPEG (chosen by name_hint)."""
+    buffer = io.BytesIO()
+
+    pygame.image.save(surf, buffer, name_hint)
+
+    return buffer.getvalue()
+
+
+def _encode_pixels(task: Tuple[bytes, Tuple[int, int], str]) -> bytes:
+    """
+    Encodes a raw pixel buffer in the encoder process.
+
+    Arguments:
+    task -- tuple of pixel buffer, (width, height) and name hint (see
+        _encode_image())
+    """
+    buffer, size, name_hint = task
+
+    return _encode_image(
+        pygame.image.frombuffer(buffer, size, PIXEL_FORMAT), name_hint)
+
+
+class BoardMirror:
+    """
+    Class representing an HTTP server that mirrors the board to web
+    browsers and video players on the local network.
+
+    Boards report the regions of the display that they redraw (see
+    ActivityBoard.add_frame_listener()). On the main loop the mirror only
+    copies the pixels of those regions. A separate encoder thread applies
+    them to its own copy of the screen and encodes only what is needed:
+    PNG patches of the changed regions for /delta clients and, at most
+    max_fps times per second, a JPEG of the whole screen for /stream.mjpg
+    clients. Regions that change again before the encoder gets to them
+    replace the older copy (i.e., frames are dropped rather than queued),
+    and nothing is encoded while the board does not change or while no
+    client is connected.
+
+    pygame holds the GIL while it encodes an image (a PNG of the whole
+    screen takes over 100 ms), which would stall the main loop even from
+    another thread. Images are therefore encoded in a separate process,
+    and threads only copy the pixels to be encoded.
+
+    Properties:
+    host -- address to listen on
+    port -- TCP port to listen on
+    max_fps -- maximum number of MJPEG frames per second
+    """
+
+    # Number of delta frames kept for clients that poll less often than
+    # the board changes
+    HISTORY_SIZE = 64
+
+    # Seconds that a /delta request waits for a change
+    LONG_POLL = 10.0
+
+    # Seconds after the last /delta request during which patches are
+    # still encoded
+    DELTA_CLIENT_TIMEOUT = 15.0
+
+    def __init__(
+            self, host: str = '0.0.0.0', port: int = 8080,
+            max_fps: float = 10) -> None:
+        self.host = host
+        self.port = port
+        self.max_fps = max_fps
+
+        self._server = None
+        self._server_thread = None
+        self._encoder_thread = None
+        self._encoder_pool = None
+        self._running = False
+
+        self._condition = threading.Condition()
+
+        # Pixels copied on the main loop, waiting for the encoder - keyed
+        # by region so that a newer copy replaces an older one
+        self._pending: Dict[Tuple[int, int, int, int], pygame.Surface] = {}
+
+        # Encoder state (protected by the condition)
+        self._frame = None
+        self._seq = 0
+        self._history = deque(maxlen=BoardMirror.HISTORY_SIZE)
+        self._png = None
+        self._png_seq = -1
+        self._jpeg = None
+        self._jpeg_seq = 0
+        self._jpeg_requested = False
+        self._mjpeg_clients = 0
+        self._last_delta_poll = 0.0
+
+    def start(self) -> None:
+        """
+        Starts the HTTP server, the encoder thread and the encoder process.
+        """
+        self._running = True
+
+        # Hide the pygame banner in the encoder process
+        os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+        # Spawn instead of fork so that the encoder does not inherit the
+        # initialized display and mixer
+        context = multiprocessing.get_context('spawn')
+
+        self._encoder_pool = context.Pool(processes=1)
+
+        self._server = ThreadingHTTPServer(
+            (self.host, self.port), self._build_handler())
+        self._server.daemon_threads = True
+
+        self._server_thread = threading.Thread(
+            target=self._server.serve_forever, name='mirror-http',
+            daemon=True)
+        self._server_thread.start()
+
+        self._encoder_thread = threading.Thread(
+            target=self._run_encoder, name='mirror-encoder', daemon=True)
+        self._encoder_thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the HTTP server, the encoder thread and the encoder process.
+        """
+        if not self._running:
+            return
+
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        self._server.shutdown()
+        self._server.server_close()
+
+        self._encoder_thread.join()
+        self._server_thread.join()
+
+        self._encoder_pool.terminate()
+        self._encoder_pool.join()
+
+    def attach(self, board: ActivityBoard) -> None:
+        """
+        Registers the mirror as a frame listener on the board. Several
+        boards drawing on regions of one display can be attached.
+        """
+        board.add_frame_listener(self._publish)
+
+    def _publish(
+            self, surface: pygame.Surface, rects: List[pygame.Rect]) -> None:
+        """
+        Copies the redrawn regions of a board surface for the encoder.
+        Called from the main loop.
+        """
+        parent = surface.get_abs_parent()
+        offset_x, offset_y = surface.get_abs_offset()
+
+        copies = []
+
+        for rect in rects:
+            rect = rect.clip(surface.get_rect())
+
+            if rect.width and rect.height:
+                copies.append((
+                    (rect.x + offset_x, rect.y + offset_y,
+                        rect.width, rect.height),
+                    surface.subsurface(rect).copy()))
+
+        with self._condition:
+            if self._frame is None:
+                self._frame = pygame.Surface(parent.get_size())
+
+            for key, pixels in copies:
+                self._pending[key] = pixels
+
+            self._condition.notify_all()
+
+    def _run_encoder(self) -> None:
+        """Encodes changed regions (encoder thread)."""
+        next_frame_time = 0.0
+
+        while True:
+            with self._condition:
+                while (self._running and not self._pending
+                        and not self._jpeg_requested):
+                    self._condition.wait()
+
+                if not self._running:
+                    return
+
+            # Changes made before the next frame time are combined into one
+            # frame (i.e., frames are dropped when the board changes faster
+            # than max_fps)
+            delay = next_frame_time - time.monotonic()
+
+            if delay > 0:
+                time.sleep(delay)
+
+            next_frame_time = time.monotonic() + 1 / self.max_fps
+
+            with self._condition:
+                pending = self._pending
+                self._pending = {}
+                self._jpeg_requested = False
+
+                for (x, y, _, _), pixels in pending.items():
+                    self._frame.blit(pixels, (x, y))
+
+                encode_patches = (time.monotonic() - self._last_delta_poll
+                    < BoardMirror.DELTA_CLIENT_TIMEOUT)
+                encode_jpeg = self._mjpeg_clients > 0
+
+            if encode_patches:
+                pngs = self._encode(
+                    [(pixels, 'patch.png') for pixels in pending.values()])
+
+                patches = [
+                    {'x': x, 'y': y,
+                        'png': base64.b64encode(png).decode('ascii')}
+                    for (x, y, _, _), png in zip(pending, pngs)]
+            else:
+                # Clients that poll later have to load the whole frame
+                patches = None
+
+            with self._condition:
+                self._seq += 1
+                self._history.append((self._seq, patches))
+                self._condition.notify_all()
+
+            if encode_jpeg:
+                # Only this thread draws on the frame, so it can be read
+                # without holding the lock
+                jpeg, = self._encode([(self._frame, 'frame.jpg')])
+
+                with self._condition:
+                    self._jpeg = jpeg
+                    self._jpeg_seq += 1
+                    self._condition.notify_all()
+
+    def _encode(self, images: List[Tuple[pygame.Surface, str]]) -> List[bytes]:
+        """
+        Encodes images in the encoder process and waits for the result
+        without holding the GIL.
+
+        Arguments:
+        images -- list of (surface, name hint) tuples (see _encode_image())
+        """
+        tasks = [
+            (pygame.image.tostring(surf, PIXEL_FORMAT), surf.get_size(),
+                name_hint)
+            for surf, name_hint in images]
+
+        return self._encoder_pool.map(_encode_pixels, tasks)
+
+    def _get_png(self) -> Tuple[int, bytes]:
+        """Returns the latest frame number and a PNG of the whole frame."""
+        with self._condition:
+            seq = self._seq
+
+            if self._png_seq == seq:
+                return seq, self._png
+
+            if self._frame is None:
+                return seq, b''
+
+            # Encoded without holding the lock, so that the encoder thread
+            # and other requests are not held up
+            frame = self._frame.copy()
+
+        png, = self._encode([(frame, 'frame.png')])
+
+        with self._condition:
+            if seq > self._png_seq:
+                self._png = png
+                self._png_seq = seq
+
+        return seq, png
+
+    def _get_delta(self, since: int) -> dict:
+        """
+        Waits for frames after since and returns their patches.
+        """
+        deadline = time.monotonic() + BoardMirror.LONG_POLL
+
+        with self._condition:
+            self._last_delta_poll = time.monotonic()
+
+            while self._running and self._seq <= since:
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    break
+
+                self._condition.wait(remaining)
+
+            frames = [(seq, patches) for seq, patches in self._history
+                if seq > since]
+
+            # The client missed frames that are no longer in the history,
+            # or frames that were encoded without patches
+            if (since < self._seq
+                    and (not frames or frames[0][0] != since + 1
+                        or any(p is None for _, p in frames))):
+                return {'seq': self._seq, 'full': True}
+
+            return {
+                'seq': self._seq,
+                'patches': [p for _, patches in frames for p in patches]}
+
+    def _wait_jpeg(self, last_seq: int) -> Tuple[int, Union[bytes, None]]:
+        """
+        Waits for a JPEG newer than last_seq. Returns None instead of the
+        JPEG when the mirror is stopped.
+        """
+        with self._condition:
+            while self._running and self._jpeg_seq <= last_seq:
+                self._condition.wait()
+
+            if not self._running:
+                return self._jpeg_seq, None
+
+            return self._jpeg_seq, self._jpeg
+
+    def _request_jpeg(self) -> None:
+        """Makes the encoder produce a JPEG for a new MJPEG client."""
+        with self._condition:
+            self._mjpeg_clients += 1
+
+            # Send the current frame right away, even if nothing changes
+            if self._frame is not None:
+                self._jpeg_requested = True
+
+            self._condition.notify_all()
+
+    def _release_jpeg(self) -> None:
+        """Called when an MJPEG client disconnects."""
+        with self._condition:
+            self._mjpeg_clients -= 1
+
+    def _build_handler(self):
+        """Returns the request handler class for the HTTP server."""
+        mirror = self
+
+        class MirrorRequestHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args) -> None:
+                # Keep the console quiet
+                pass
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+
+                if url.path == '/':
+                    self._send(200, 'text/html', VIEWER_PAGE)
+                elif url.path == '/frame.png':
+                    seq, png = mirror._get_png()
+                    self._send(
+                        200, 'image/png', png, {'X-Frame-Seq': str(seq)})
+                elif url.path == '/delta':
+                    try:
+                        since = int(parse_qs(url.query)['seq'][0])
+                    except (KeyError, ValueError):
+                        self._send(400, 'text/plain', b'seq required')
+                        return
+
+                    self._send(
+                        200, 'application/json',
+                        json.dumps(mirror._get_delta(since)).encode('utf-8'))
+                elif url.path == '/stream.mjpg':
+                    self._stream_mjpeg()
+                else:
+                    self._send(404, 'text/plain', b'not found')
+
+            def _send(
+                    self, status: int, content_type: str, body: bytes,
+                    headers: Union[dict, None] = None) -> None:
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream_mjpeg(self) -> None:
+                self.send_response(200)
+                self.send_header(
+                    'Content-Type',
+                    'multipart/x-mixed-replace; boundary=frame')
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+
+                mirror._request_jpeg()
+
+                seq = 0
+
+                try:
+                    while True:
+                        seq, jpeg = mirror._wait_jpeg(seq)
+
+                        if jpeg is None:
+                            break
+
+                        self.wfile.write(
+                            b'--frame\r\nContent-Type: image/jpeg\r\n'
+                            + f'Content-Length: {len(jpeg)}\r\n\r\n'.encode(
+                                'ascii')
+                            + jpeg + b'\r\n')
+                except (ConnectionError, OSError):
+                    pass
+                finally:
+                    mirror._release_jpeg()
+
+        return MirrorRequestHandler
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
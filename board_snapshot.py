@@ -0,0 +1,283 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Compact snapshots of the game state for resuming after a crash or power
+loss
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import os
+import struct
+import threading
+
+from typing import List, Union
+
+
+class BoardSnapshot:
+    """
+    Class representing the state of a game in a compact binary form.
+
+    Activities are stored as indices into the activity list and the chosen
+    number of repetitions as an index into the options in parentheses, so
+    a snapshot of a 12-door board takes about 50 bytes.
+
+    Properties:
+    state -- value of the ActivityBoard.State member
+    selected -- index of the selected door
+    activities_crc -- CRC-32 of the activity list the indices refer to
+    open_doors -- bitfield with bit n set if door n has been opened
+    activity_indices -- index in the activity list of the activity behind
+        each door
+    rep_choices -- index of the chosen repetition option for each door
+        (NO_CHOICE if the activity has no options)
+    """
+    __slots__ = (
+        'state', 'selected', 'activities_crc', 'open_doors',
+        'activity_indices', 'rep_choices')
+
+    MAGIC = b'ASBS'
+    VERSION = 1
+
+    # Magic, version, state, number of doors, selected door and CRC-32 of
+    # the activity list
+    HEADER_FORMAT = '<4sBBHHI'
+
+    # Activity index and repetition choice of one door
+    DOOR_FORMAT = 'HB'
+
+    NO_CHOICE = 0xFF
+
+    def __init__(
+            self, state: int, selected: int, activities_crc: int,
+            open_doors: int, activity_indices: List[int],
+            rep_choices: List[int]) -> None:
+        self.state = state
+        self.selected = selected
+        self.activities_crc = activities_crc
+        self.open_doors = open_doors
+        self.activity_indices = activity_indices
+        self.rep_choices = rep_choices
+
+    @property
+    def num_doors(self) -> int:
+        """Returns the number of doors in the snapshot."""
+        return len(self.activity_indices)
+
+    def is_open(self, index: int) -> bool:
+        """Returns True if the door with the specified index is open."""
+        return bool(self.open_doors >> index & 1)
+
+    def to_bytes(self) -> bytes:
+        """Returns the snapshot packed into bytes."""
+        num_doors = self.num_doors
+
+        door_data = [0] * (num_doors * 2)
+        door_data[0::2] = self.activity_indices
+        door_data[1::2] = self.rep_choices
+
+        return (struct.pack(
+                BoardSnapshot.HEADER_FORMAT, BoardSnapshot.MAGIC,
+                BoardSnapshot.VERSION, self.state, num_doors, self.selected,
+                self.activities_crc)
+            + self.open_doors.to_bytes((num_doors + 7) // 8, 'little')
+            + struct.pack(
+                '<' + BoardSnapshot.DOOR_FORMAT * num_doors, *door_data))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BoardSnapshot':
+        """
+        Unpacks a snapshot created by to_bytes().
+
+        Raises ValueError if the data is not a valid snapshot.
+        """
+        header_size = struct.calcsize(BoardSnapshot.HEADER_FORMAT)
+
+        try:
+            (magic, version, state, num_doors, selected,
+                activities_crc) = struct.unpack_from(
+                    BoardSnapshot.HEADER_FORMAT, data)
+        except struct.error:
+            raise ValueError('snapshot is too short')
+
+        if magic != BoardSnapshot.MAGIC:
+            raise ValueError('not a board snapshot')
+
+        if version != BoardSnapshot.VERSION:
+            raise ValueError(f'unsupported snapshot version: {version}')
+
+        bitfield_size = (num_doors + 7) // 8
+        door_format = '<' + BoardSnapshot.DOOR_FORMAT * num_doors
+
+        if (len(data) != header_size + bitfield_size
+                + struct.calcsize(door_format)):
+            raise ValueError('snapshot has the wrong length')
+
+        open_doors = int.from_bytes(
+            data[header_size:header_size + bitfield_size], 'little')
+
+        door_data = struct.unpack_from(
+            door_format, data, header_size + bitfield_size)
+
+        return cls(
+            state=state,
+            selected=selected,
+            activities_crc=activities_crc,
+            open_doors=open_doors,
+            activity_indices=list(door_data[0::2]),
+            rep_choices=list(door_data[1::2]))
+
+
+class SnapshotStore:
+    """
+    Class to keep the latest snapshot of a board in a file, written by a
+    background thread.
+
+    The board reports each change of state through a listener (see
+    attach()). The listener only packs the snapshot and hands it to the
+    writer thread, which writes the newest snapshot to a temporary file,
+    flushes it to disk and renames it over the previous one, so the file
+    always holds a complete snapshot. Snapshots that arrive while a write
+    is in progress replace each other, so only the newest is written.
+
+    The file is removed when the game is over, so the next start shows a
+    new board.
+
+    Properties:
+    file -- path of the snapshot file
+    """
+
+    # Pending value that removes the snapshot file
+    _CLEAR = b''
+
+    def __init__(self, file: str) -> None:
+        self.file = file
+
+        self._pending = None
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self) -> None:
+        """Starts the writer thread."""
+        self._stopping = False
+
+        self._thread = threading.Thread(
+            target=self._run, name='snapshot-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Writes any pending snapshot and waits for the writer thread to
+        exit.
+        """
+        if self._thread is None:
+            return
+
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+
+        self._thread.join()
+
+        self._thread = None
+
+    def load(self) -> Union[BoardSnapshot, None]:
+        """
+        Returns the snapshot saved in the file, or None if there is no
+        snapshot or it cannot be read.
+        """
+        try:
+            with open(self.file, 'rb') as f:
+                return BoardSnapshot.from_bytes(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def save(self, snapshot: Union[BoardSnapshot, None]) -> None:
+        """
+        Queues a snapshot to be written, or removal of the snapshot file if
+        snapshot is None.
+        """
+        if snapshot is None:
+            data = SnapshotStore._CLEAR
+        else:
+            data = snapshot.to_bytes()
+
+        with self._condition:
+            self._pending = data
+            self._condition.notify()
+
+    def attach(self, board) -> None:
+        """
+        Registers the store as a listener on an ActivityBoard so that a
+        snapshot is saved on every change of state.
+        """
+        board.add_listener(lambda b: self.save(b.get_snapshot()))
+
+    def _run(self) -> None:
+        """Main function of the writer thread."""
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopping:
+                    self._condition.wait()
+
+                data = self._pending
+                self._pending = None
+
+                if data is None:
+                    return
+
+            try:
+                self._write(data)
+            except OSError as e:
+                # Snapshots are a convenience - never stop the game
+                print(f'Unable to write snapshot: {e}')
+
+    def _write(self, data: bytes) -> None:
+        """
+        Writes or removes the snapshot file. Called from the writer thread.
+        """
+        if data == SnapshotStore._CLEAR:
+            try:
+                os.remove(self.file)
+            except FileNotFoundError:
+                pass
+
+            return
+
+        temp_file = self.file + '.tmp'
+
+        with open(temp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_file, self.file)
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
@@ -0,0 +1,101 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Builds the packed sound bank used when "sound_bank" is enabled in the
+configuration
+
+Decodes every sound effect listed in the configuration (including sounds
+overridden for individual boards) with the same mixer settings as
+main.py and writes them to the sound bank file. Run it on the device that
+runs the board, and again whenever the sound files or the configured
+sounds change.
+
+Usage: build_sound_bank.py [--output FILE] [CONFIG_FILE]
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import argparse
+import json
+import os
+
+from typing import List
+
+import pygame
+
+from sound_bank import build_sound_bank
+
+
+def sound_files(config: dict) -> List[str]:
+    """
+    Returns the names of all sound files listed in the configuration.
+    """
+    board_configs = [config.get('board', {})]
+
+    for spec in config.get('boards') or []:
+        board_configs.append(spec.get('config', {}).get('board', {}))
+
+    files = []
+
+    for board_config in board_configs:
+        for file_names in board_config.get('sound', {}).values():
+            files.extend(file_names)
+
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Build the packed sound bank from the configuration.')
+    parser.add_argument('config_file', nargs='?', default='config.json')
+    parser.add_argument(
+        '--output',
+        help='sound bank file (default: file in sound_bank configuration)')
+    args = parser.parse_args()
+
+    with open(args.config_file, 'r') as f:
+        config = json.load(f)
+
+    output = args.output or config.get('sound_bank', {}).get(
+        'file', 'sounds/sounds.bank')
+
+    # Same settings as main.py so that the data matches the mixer format
+    pygame.mixer.init(buffer=512)
+
+    count = build_sound_bank(sound_files(config), output)
+
+    frequency, size, channels = pygame.mixer.get_init()
+
+    print(f'Wrote {count} sounds to {output} '
+        f'({frequency} Hz, {abs(size)}-bit, {channels} channels, '
+        f'{os.path.getsize(output)} bytes)')
+
+    pygame.mixer.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -33,8 +33,13 @@ https://github.com/davidsmakerworks/activity-board
 """
 
 
+from typing import Iterable, List, Tuple, Union
+
 import pygame
+import pygame.freetype
 
+from asset_cache import AssetCache
+from memory_budget import SurfaceBudget, surface_bytes
 from text_renderer import TextRenderer
 
 
@@ -44,7 +49,7 @@ class DoorProperties:
 
     All color-related properties are pygame Color objects.
 
-    All font-related properties are pygame Font objects.
+    All font-related properties are pygame Font or freetype Font objects.
 
     Properties:
     bg_color -- background color of the underlying activity board surface
@@ -64,16 +69,31 @@ class DoorProperties:
     open_step_time -- time in seconds to delay after each step of the
         door opening animation. Adjust as needed for individual computer
         performance.
+    surface_depth -- color depth in bits per pixel of the door surfaces
+        (0 for the default depth)
+
+    A single DoorProperties object is normally shared by every door on the
+    board. Use with_overrides() to create a separate object for a door that
+    needs to look different.
     """
+    __slots__ = (
+        'bg_color', 'door_color', 'ellipse_color', 'number_color',
+        'cross_color', 'selection_color', 'activity_color', 'unused_color',
+        'activity_font', 'line_spacing', 'number_font', 'border_size',
+        'ellipse_margin', 'cross_width', 'cross_offset', 'open_step_time',
+        'surface_depth')
+
     def __init__(
             self, bg_color: pygame.Color, door_color: pygame.Color,
             ellipse_color: pygame.Color, number_color: pygame.Color,
             cross_color: pygame.Color, selection_color: pygame.Color,
             activity_color: pygame.Color, unused_color: pygame.Color,
-            activity_font: pygame.font.Font, line_spacing: int,
-            number_font: pygame.font.Font, border_size: int,
+            activity_font: Union[pygame.font.Font, pygame.freetype.Font],
+            line_spacing: int,
+            number_font: Union[pygame.font.Font, pygame.freetype.Font],
+            border_size: int,
             ellipse_margin: int, cross_width: int, cross_offset: int,
-            open_step_time: float) -> None:
+            open_step_time: float, surface_depth: int = 0) -> None:
         self.bg_color = bg_color
         self.door_color = door_color
         self.ellipse_color = ellipse_color
@@ -90,6 +110,76 @@ class DoorProperties:
         self.cross_width = cross_width
         self.cross_offset = cross_offset
         self.open_step_time = open_step_time
+        self.surface_depth = surface_depth
+
+    @classmethod
+    def from_config(
+            cls, config: dict, assets: AssetCache) -> 'DoorProperties':
+        """
+        Builds a DoorProperties object from the activity board configuration.
+
+        Arguments:
+        config -- dictionary representing the activity board configuration
+        assets -- AssetCache object used to load the fonts
+        """
+        door_colors = config['door']['color']
+
+        text_backend = config['display'].get('text_backend', 'font')
+
+        activity_font = assets.get_font(
+            config['door']['font']['activity']['file'],
+            config['door']['font']['activity']['size'],
+            text_backend)
+
+        number_font = assets.get_font(
+            config['door']['font']['number']['file'],
+            config['door']['font']['number']['size'],
+            text_backend)
+
+        return cls(
+            bg_color=pygame.Color(config['board']['bg_color']),
+            door_color=pygame.Color(door_colors['door']),
+            ellipse_color=pygame.Color(door_colors['ellipse']),
+            number_color=pygame.Color(door_colors['number']),
+            cross_color=pygame.Color(door_colors['cross']),
+            selection_color=pygame.Color(door_colors['selection']),
+            activity_color=pygame.Color(door_colors['activity']),
+            unused_color=pygame.Color(door_colors['unused']),
+            activity_font=activity_font,
+            line_spacing=config['door']['line_spacing'],
+            number_font=number_font,
+            border_size=config['door']['border_size'],
+            ellipse_margin=config['door']['ellipse_margin'],
+            cross_width=config['door']['cross_width'],
+            cross_offset=config['door']['cross_offset'],
+            open_step_time=config['door']['open_step_time'],
+            surface_depth=config['display'].get('depth', 0))
+
+    def changed_properties(self, other: 'DoorProperties') -> List[str]:
+        """
+        Returns list of the names of properties that differ between this
+        object and another DoorProperties object.
+        """
+        return [name for name in self.__slots__
+            if getattr(self, name) != getattr(other, name)]
+
+    def with_overrides(self, **overrides) -> 'DoorProperties':
+        """
+        Returns a new DoorProperties object with the same values as this one
+        except for the properties passed as keyword arguments.
+
+        The shared object is never modified, so this is the way to customize
+        an individual door.
+        """
+        values = {name: getattr(self, name) for name in self.__slots__}
+
+        for name in overrides:
+            if name not in values:
+                raise AttributeError(f'unknown door property: {name}')
+
+        values.update(overrides)
+
+        return DoorProperties(**values)
 
 
 class Door:
@@ -115,14 +205,61 @@ class Door:
         performance by minimizing unnecessary surface blits
     pct_open -- integer percentage of door that is currently displayed -
         used for door-opening animation routine
+    transition -- DoorTransition object used to draw the door while it is
+        partially open (None to use the growing rectangle reveal)
+    budget -- SurfaceBudget shared by the doors of a board that limits the
+        total size of their cached surfaces (None for no limit)
+
+    Each visual state of the door is rendered once and cached (see
+    SURFACE_KEYS). Call clear_cache() after changing the activity, size or
+    props of the door.
     """
+    __slots__ = (
+        'index', 'height', 'width', 'activity', 'props', 'is_selected',
+        'is_open', 'is_revealed', 'is_hidden', 'is_updated', 'pct_open',
+        'transition', 'budget', '_surfaces')
+
+    # Names of the cached door surfaces:
+    # hidden -- blank box shown before the door appears
+    # closed -- closed door with number
+    # crossed -- door that has already been opened
+    # revealed -- activity text in activity color
+    # unused -- activity text in unused color (endgame reveal)
+    # The closed and crossed states also have a "_selected" variant.
+    SURFACE_KEYS = (
+        'hidden', 'closed', 'closed_selected', 'crossed', 'crossed_selected',
+        'revealed', 'unused')
+
+    # Cached surfaces that need to be rendered again when a property in
+    # DoorProperties changes
+    SURFACE_DEPENDENCIES = {
+        'bg_color': SURFACE_KEYS,
+        'door_color': ('closed', 'closed_selected'),
+        'ellipse_color': ('closed', 'closed_selected'),
+        'number_color': ('closed', 'closed_selected'),
+        'cross_color': ('crossed', 'crossed_selected'),
+        'selection_color': ('closed_selected', 'crossed_selected'),
+        'activity_color': ('revealed',),
+        'unused_color': ('unused',),
+        'activity_font': ('revealed', 'unused'),
+        'line_spacing': ('revealed', 'unused'),
+        'number_font': ('closed', 'closed_selected'),
+        'border_size': (
+            'closed', 'closed_selected', 'crossed', 'crossed_selected'),
+        'ellipse_margin': ('closed', 'closed_selected'),
+        'cross_width': ('crossed', 'crossed_selected'),
+        'cross_offset': ('crossed', 'crossed_selected'),
+        'open_step_time': (),
+        'surface_depth': SURFACE_KEYS
+    }
 
     def __init__(
             self, index: int, height: int, width: int, activity: str,
             props: DoorProperties, is_selected: bool = False,
             is_open: bool = False,
             is_revealed: bool = False,
-            is_hidden: bool = False) -> None:
+            is_hidden: bool = False,
+            budget: Union[SurfaceBudget, None] = None) -> None:
         self.index = index
         self.height = height
         self.width = width
@@ -139,6 +276,102 @@ class Door:
         # Always assume that a new door starts fully closed
         self.pct_open = 0
 
+        self.transition = None
+
+        self.budget = budget
+
+        self._surfaces = {}
+
+    def clear_cache(self, keys: Union[Iterable[str], None] = None) -> None:
+        """
+        Discards cached surfaces for the door.
+
+        Arguments:
+        keys -- names of the surfaces to discard (default is all surfaces)
+        """
+        if keys is None:
+            keys = list(self._surfaces)
+
+        for key in keys:
+            if self._surfaces.pop(key, None) is not None:
+                if self.budget is not None:
+                    self.budget.remove(self, key)
+
+    def has_cached_surface(self, key: str) -> bool:
+        """Returns True if the surface with the given key is cached."""
+        return key in self._surfaces
+
+    def set_cached_surface(self, key: str, surf: pygame.Surface) -> None:
+        """
+        Stores a surface rendered elsewhere (e.g., in a worker process) in
+        the cache.
+        """
+        if key not in Door.SURFACE_KEYS:
+            raise KeyError(f'unknown door surface: {key}')
+
+        self._surfaces[key] = surf
+
+        if self.budget is not None:
+            self.budget.add(self, key, surf)
+
+    def cached_bytes(self) -> int:
+        """Returns the total size of the cached surfaces of the door."""
+        return sum(surface_bytes(s) for s in self._surfaces.values())
+
+    def get_cached_surface(self, key: str) -> pygame.Surface:
+        """
+        Returns the cached surface with the given key, rendering it first
+        if necessary.
+
+        The returned surface is shared and must not be modified.
+        """
+        surf = self._surfaces.get(key)
+
+        if surf is None:
+            surf = self.render_surface(key)
+            self.set_cached_surface(key, surf)
+        elif self.budget is not None:
+            self.budget.touch(self, key)
+
+        return surf
+
+    def render_surface(self, key: str) -> pygame.Surface:
+        """
+        Renders and returns a new surface for one of the door states listed
+        in SURFACE_KEYS without using the cache.
+        """
+        if key == 'hidden':
+            surf = self._new_surface()
+            surf.fill(self.props.bg_color)
+
+            return surf
+        elif key in ('closed', 'closed_selected'):
+            return self._render_closed(key == 'closed_selected')
+        elif key in ('crossed', 'crossed_selected'):
+            return self._render_crossed(key == 'crossed_selected')
+        elif key == 'revealed':
+            return self._render_activity(self.props.activity_color)
+        elif key == 'unused':
+            return self._render_activity(self.props.unused_color)
+        else:
+            raise KeyError(f'unknown door surface: {key}')
+
+    def _new_surface(self) -> pygame.Surface:
+        """Returns a new door-sized surface at the configured depth."""
+        if self.props.surface_depth:
+            return pygame.Surface(
+                (self.width, self.height), 0, self.props.surface_depth)
+
+        return pygame.Surface((self.width, self.height))
+
+    def _interior_rect(self) -> pygame.Rect:
+        """Returns the rectangle inside the selection border."""
+        return pygame.Rect(
+            self.props.border_size,
+            self.props.border_size,
+            self.width - self.props.border_size * 2,
+            self.height - self.props.border_size * 2)
+
     def _draw_cross(self, surf: pygame.Surface) -> None:
         """
         Draws a cross (X) on the door surface to show that the door has
@@ -161,118 +394,161 @@ class Door:
                 self.props.cross_offset * 2),
             self.props.cross_width)
 
-    def get_door_surface(self) -> pygame.Surface:
+    def _render_crossed(self, selected: bool) -> pygame.Surface:
         """
-        Build and return a pygame Surface object representing the door in
-        its current state based on the Door object properties.
-
-        TODO: Move some drawing code to separate methods to improve readability.
+        Renders the door as an X to show that it has already been opened.
         """
-        surf = pygame.Surface((self.width, self.height))
+        surf = self._new_surface()
 
-        interior_rect = pygame.Rect(
-            self.props.border_size,
-            self.props.border_size,
-            self.width - self.props.border_size * 2,
-            self.height - self.props.border_size * 2)
+        if selected:
+            surf.fill(self.props.selection_color)
+        else:
+            surf.fill(self.props.bg_color)
+
+        surf.fill(self.props.bg_color, self._interior_rect())
+
+        self._draw_cross(surf)
+
+        return surf
 
+    def _render_activity(self, text_color: pygame.Color) -> pygame.Surface:
+        """
+        Renders the activity text centered on the door background in the
+        specified color.
+        """
         activity_renderer = TextRenderer(
             font=self.props.activity_font,
             line_spacing=self.props.line_spacing,
-            text_color=self.props.activity_color)
+            text_color=text_color,
+            depth=self.props.surface_depth)
+
+        surf = self._new_surface()
+
+        surf.fill(self.props.bg_color)
+
+        activity_renderer.render_to(
+            surf, (self.width // 2, self.height // 2), self.activity)
+
+        return surf
+
+    def _render_closed(self, selected: bool) -> pygame.Surface:
+        """
+        Renders the closed door with the door number.
+        """
+        surf = self._new_surface()
+
+        if selected:
+            # If the door is currently selected, render a box around the
+            # door to indicate this.
+            surf.fill(self.props.selection_color)
+        else:
+            surf.fill(self.props.bg_color)
+
+        surf.fill(self.props.door_color, self._interior_rect())
+
+        ellipse_rect = pygame.Rect(
+            self.props.ellipse_margin,
+            self.props.ellipse_margin,
+            self.width - self.props.ellipse_margin * 2,
+            self.height - self.props.ellipse_margin * 2)
+
+        pygame.draw.ellipse(
+            surf, self.props.ellipse_color, ellipse_rect)
+
+        number_renderer = TextRenderer(
+            font=self.props.number_font,
+            line_spacing=0,
+            text_color=self.props.number_color,
+            depth=self.props.surface_depth)
+
+        number_renderer.render_to(
+            surf, (self.width // 2, self.height // 2), str(self.index + 1))
+
+        return surf
+
+    def get_door_surface(self) -> pygame.Surface:
+        """
+        Return a pygame Surface object representing the door in its current
+        state based on the Door object properties.
+
+        Fully opened, closed and revealed doors are returned straight from
+        the cache, so the returned surface must not be modified.
+        """
+        layers = self.get_door_layers()
+
+        if len(layers) == 1:
+            return layers[0][0]
+
+        surf = layers[0][0].copy()
+
+        for layer, offset, area in layers[1:]:
+            surf.blit(layer, offset, area)
 
+        return surf
+
+    def get_door_layers(self) -> List[
+            Tuple[pygame.Surface, Tuple[int, int], Union[pygame.Rect, None]]]:
+        """
+        Returns the door in its current state as a list of layers to be
+        drawn in order. Each layer is a tuple of a surface, the offset from
+        the top left corner of the door and the area of the surface to draw
+        (None for the whole surface), as passed to Surface.blit().
+
+        Drawing the layers directly onto the board avoids building a new
+        surface for each frame of the opening animation.
+        """
         if self.is_hidden:
             # Door is hidden - render as blank box
-            surf.fill(self.props.bg_color)
+            return [(self.get_cached_surface('hidden'), (0, 0), None)]
         elif self.is_open and not self.is_revealed:
             # If door has been opened and we are not in the endgame reveal,
             # render door as an X
             if self.is_selected:
-                surf.fill(self.props.selection_color)
+                key = 'crossed_selected'
             else:
-                surf.fill(self.props.bg_color)
-
-            surf.fill(self.props.bg_color, interior_rect)
+                key = 'crossed'
 
-            self._draw_cross(surf)
+            return [(self.get_cached_surface(key), (0, 0), None)]
         elif self.is_revealed:
             # Endgame reveal - render with standard text color if the door
             # was opened during the game, otherwise render in a distinctive
             # color to show that the door was not opened during the game.
             if self.is_open:
-                activity_renderer.text_color = self.props.activity_color
+                key = 'revealed'
             else:
-                activity_renderer.text_color = self.props.unused_color
+                key = 'unused'
 
-            activity_surface = activity_renderer.render_surface(self.activity)
+            return [(self.get_cached_surface(key), (0, 0), None)]
 
-            activity_rect = activity_surface.get_rect()
-
-            surf.fill(self.props.bg_color)
-            surf.blit(
-                activity_surface,
-                ((self.width // 2) - (activity_rect.width // 2),
-                (self.height // 2) - (activity_rect.height // 2)))
+        if self.is_selected:
+            closed_surface = self.get_cached_surface('closed_selected')
         else:
-            if self.is_selected:
-                # If the door is currently selected, render a box around the
-                # door to indicate this.
-                surf.fill(self.props.selection_color)
-            else:
-                surf.fill(self.props.bg_color)
-
-            surf.fill(self.props.door_color, interior_rect)
-
-            ellipse_rect = pygame.Rect(
-                self.props.ellipse_margin,
-                self.props.ellipse_margin,
-                self.width - self.props.ellipse_margin * 2,
-                self.height - self.props.ellipse_margin * 2)
-
-            pygame.draw.ellipse(
-                surf, self.props.ellipse_color, ellipse_rect)
+            closed_surface = self.get_cached_surface('closed')
 
-            number_surface = self.props.number_font.render(
-                    str(self.index + 1), True, self.props.number_color)
-            number_rect = number_surface.get_rect()
+        if self.pct_open <= 0:
+            return [(closed_surface, (0, 0), None)]
 
-            surf.blit(
-                number_surface,
-                ((self.width // 2) - (number_rect.width // 2),
-                (self.height // 2) - (number_rect.height // 2)))
+        if self.transition is not None:
+            return [(
+                self.transition.get_frame(self.pct_open / 100), (0, 0), None)]
 
-            # If the door is partially "open", reveal a portion of the
-            # activity text surface
-            #
-            # This reveals a rectangular portion based on the pct_open
-            # property, where pct_open = 100 represents a door that is
-            # completely open.
-            if self.pct_open > 0:
-                activity_small_surface = activity_renderer.render_surface(
-                    self.activity)
+        # If the door is partially "open", reveal a portion of the
+        # activity text surface
+        #
+        # This reveals a rectangular portion based on the pct_open
+        # property, where pct_open = 100 represents a door that is
+        # completely open.
+        open_width = int(self.width * (self.pct_open / 100))
+        open_height = int(self.height * (self.pct_open / 100))
 
-                small_rect = activity_small_surface.get_rect()
+        x = (self.width - open_width) // 2
+        y = (self.height - open_height) // 2
 
-                open_width = int(self.width * (self.pct_open / 100))
-                open_height = int(self.height * (self.pct_open / 100))
+        open_rect = pygame.Rect(x, y, open_width, open_height)
 
-                open_surface = pygame.Surface((self.width, self.height))
-
-                open_surface.fill(self.props.bg_color)
-
-                open_surface.blit(
-                    activity_small_surface,
-                    ((self.width // 2) - (small_rect.width // 2),
-                    (self.height // 2) - (small_rect.height // 2)))
-
-                x = (self.width - open_width) // 2
-                y = (self.height - open_height) // 2
-
-                open_rect = pygame.Rect(x, y, open_width, open_height)
-
-                surf.blit(open_surface, (x, y), open_rect)
-
-        return surf
+        return [
+            (closed_surface, (0, 0), None),
+            (self.get_cached_surface('revealed'), (x, y), open_rect)]
 
 
 if __name__ == '__main__':
@@ -0,0 +1,108 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+File watcher used to reload activities and configuration
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import os
+import time
+
+from typing import Dict, List, Union
+
+
+class FileWatcher:
+    """
+    Class to detect changes to a set of files by polling their modification
+    times.
+
+    Polling is rate-limited, so check() can be called every frame and will
+    only touch the file system once per interval.
+
+    Properties:
+    interval -- minimum time in seconds between checks of the file system
+    """
+
+    def __init__(self, paths: List[str], interval: float = 1.0) -> None:
+        self.interval = interval
+
+        self._mtimes: Dict[str, Union[float, None]] = {}
+        self._next_check = time.monotonic() + interval
+
+        for path in paths:
+            self.watch(path)
+
+    def _get_mtime(self, path: str) -> Union[float, None]:
+        """Returns the modification time of a file or None if it is missing."""
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def watch(self, path: str) -> None:
+        """Starts watching a file, recording its current modification time."""
+        self._mtimes[path] = self._get_mtime(path)
+
+    def unwatch(self, path: str) -> None:
+        """Stops watching a file."""
+        self._mtimes.pop(path, None)
+
+    def forget(self, path: str) -> None:
+        """
+        Makes the next check report the file as changed (e.g., if it could
+        not be read because it was only partially written).
+        """
+        if path in self._mtimes:
+            self._mtimes[path] = None
+
+    def check(self) -> List[str]:
+        """
+        Returns a list of the watched files that have changed since the
+        last check. Returns an empty list if the interval has not elapsed.
+        """
+        now = time.monotonic()
+
+        if now < self._next_check:
+            return []
+
+        self._next_check = now + self.interval
+
+        changed = []
+
+        for path, old_mtime in self._mtimes.items():
+            mtime = self._get_mtime(path)
+
+            if mtime is not None and mtime != old_mtime:
+                self._mtimes[path] = mtime
+                changed.append(path)
+
+        return changed
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
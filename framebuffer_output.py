@@ -0,0 +1,250 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Framebuffer output in a memory-mapped file for other processes (e.g., an
+external compositor)
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import mmap
+import os
+import struct
+
+from typing import List
+
+import pygame
+
+from activity_board import ActivityBoard
+
+
+class FramebufferOutput:
+    """
+    Class that keeps a copy of the display in a memory-mapped file, which
+    other processes can map to read frames without copying them. Use a
+    file under /dev/shm for POSIX shared memory that is never written to
+    disk.
+
+    The file starts with a header of HEADER_SIZE bytes, followed by the
+    pixels. All header fields are little-endian:
+
+    offset 0 -- magic (4 bytes: ASFB)
+    offset 4 -- format version (16-bit)
+    offset 8 -- header size, i.e., offset of the first pixel (32-bit)
+    offset 12 -- width in pixels (32-bit)
+    offset 16 -- height in pixels (32-bit)
+    offset 20 -- pitch, i.e., bytes from one row to the next (32-bit)
+    offset 24 -- pixel format as a DRM fourcc (4 bytes: XR24, i.e., 32-bit
+        pixels with blue in the lowest byte followed by green, red and an
+        unused byte)
+    offset 28 -- number of dirty rectangles in the last frame (32-bit)
+    offset 32 -- frame counter (64-bit)
+    offset 64 -- dirty rectangles of the last frame (up to MAX_RECTS sets
+        of 32-bit x, y, width and height)
+
+    The frame counter is odd while a frame is being written and even when
+    it is complete, so the number of complete frames is the counter
+    divided by two. A reader should read the counter, skip the frame if it
+    is odd, copy what it needs and read the counter again, and discard the
+    copy if the counter has changed. If the counter has advanced by more
+    than two since the last frame a reader used, it missed frames and
+    should read the whole frame instead of only the dirty rectangles.
+
+    Boards report the regions that they redraw (see
+    ActivityBoard.add_frame_listener()), and only those regions are
+    copied into the file, on the main loop.
+
+    Properties:
+    file -- path of the framebuffer file
+    width -- width of the display in pixels
+    height -- height of the display in pixels
+    """
+
+    MAGIC = b'ASFB'
+    VERSION = 1
+
+    # Pixels start on a page boundary
+    HEADER_SIZE = 4096
+
+    # Magic, version, reserved, header size, width, height, pitch, pixel
+    # format and number of dirty rectangles
+    HEADER_FORMAT = '<4sHHIIII4sI'
+
+    RECT_COUNT_OFFSET = 28
+    FRAME_COUNTER_OFFSET = 32
+    RECTS_OFFSET = 64
+
+    # A frame with more dirty rectangles than this is reported as one
+    # rectangle covering the whole display
+    MAX_RECTS = 64
+
+    PIXEL_FORMAT = b'XR24'
+
+    def __init__(self, file: str, width: int, height: int) -> None:
+        self.file = file
+        self.width = width
+        self.height = height
+
+        self._pitch = width * 4
+
+        self._mmap = None
+        self._pixels = None
+        self._surface = None
+        self._frame_counter = 0
+
+        # Set once the whole display has been copied
+        self._has_frame = False
+
+    def start(self) -> None:
+        """
+        Creates the framebuffer file (or resizes an existing one) and maps
+        it into memory.
+        """
+        size = FramebufferOutput.HEADER_SIZE + self._pitch * self.height
+
+        fd = os.open(self.file, os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            os.ftruncate(fd, size)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        self._pixels = memoryview(self._mmap)[FramebufferOutput.HEADER_SIZE:]
+
+        try:
+            # Surface sharing the mapped memory, so blitting to it writes
+            # straight into the file
+            self._surface = pygame.image.frombuffer(
+                self._pixels, (self.width, self.height), 'BGRA')
+        except ValueError:
+            self.stop()
+
+            raise RuntimeError(
+                'framebuffer output requires pygame 2.1.3 or later')
+
+        self._frame_counter = 0
+        self._has_frame = False
+
+        struct.pack_into(
+            FramebufferOutput.HEADER_FORMAT, self._mmap, 0,
+            FramebufferOutput.MAGIC, FramebufferOutput.VERSION, 0,
+            FramebufferOutput.HEADER_SIZE, self.width, self.height,
+            self._pitch, FramebufferOutput.PIXEL_FORMAT, 0)
+        self._write_frame_counter()
+
+    def stop(self) -> None:
+        """
+        Unmaps the framebuffer file. The file is left in place with the
+        last frame.
+        """
+        if self._mmap is None:
+            return
+
+        # The surface and the memoryview must be released before the
+        # mapping can be closed
+        self._surface = None
+        self._pixels.release()
+        self._pixels = None
+
+        self._mmap.close()
+        self._mmap = None
+
+    def attach(self, board: ActivityBoard) -> None:
+        """
+        Registers the output as a frame listener on the board. Several
+        boards drawing on regions of one display can be attached.
+        """
+        board.add_frame_listener(self._publish)
+
+    def _write_frame_counter(self) -> None:
+        """Writes the frame counter to the header."""
+        struct.pack_into(
+            '<Q', self._mmap, FramebufferOutput.FRAME_COUNTER_OFFSET,
+            self._frame_counter)
+
+    def _publish(
+            self, surface: pygame.Surface, rects: List[pygame.Rect]) -> None:
+        """
+        Copies the redrawn regions of a board surface into the framebuffer
+        as one frame. Called from the main loop.
+        """
+        if self._mmap is None:
+            return
+
+        # Board surfaces are usually subsurfaces of the display, so the
+        # regions are copied from the display at their absolute position
+        parent = surface.get_abs_parent()
+        offset_x, offset_y = surface.get_abs_offset()
+
+        bounds = pygame.Rect(
+            offset_x, offset_y,
+            surface.get_width(), surface.get_height()).clip(
+                self._surface.get_rect())
+
+        if self._has_frame:
+            dirty = []
+
+            for rect in rects:
+                rect = rect.move(offset_x, offset_y).clip(bounds)
+
+                if rect.width and rect.height:
+                    dirty.append(rect)
+
+            if not dirty:
+                return
+
+            if len(dirty) > FramebufferOutput.MAX_RECTS:
+                dirty = [bounds]
+        else:
+            # The first frame copies the whole display, including any
+            # regions drawn by other boards
+            dirty = [parent.get_rect().clip(self._surface.get_rect())]
+
+            self._has_frame = True
+
+        # Odd counter tells readers that the frame is incomplete
+        self._frame_counter += 1
+        self._write_frame_counter()
+
+        for rect in dirty:
+            self._surface.blit(parent, rect, rect)
+
+        struct.pack_into(
+            '<I', self._mmap, FramebufferOutput.RECT_COUNT_OFFSET,
+            len(dirty))
+        struct.pack_into(
+            '<' + 'IIII' * len(dirty), self._mmap,
+            FramebufferOutput.RECTS_OFFSET,
+            *[value for rect in dirty for value in rect])
+
+        self._frame_counter += 1
+        self._write_frame_counter()
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
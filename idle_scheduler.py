@@ -0,0 +1,130 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Cooperative scheduler for background work done while the board is idle
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import time
+
+from typing import Callable, Dict, List, Tuple, Union
+
+
+class IdleScheduler:
+    """
+    Class that runs background work in small steps within a time budget
+    while the board is waiting for the player (e.g., rendering surfaces
+    that will soon be needed).
+
+    Work is described by task functions in order of priority. Each call to
+    a task does at most one small piece of work and returns True, or
+    returns False if the task has nothing to do. run() starts again from
+    the highest priority task after every step, so work that has become
+    more urgent (e.g., because the selection moved) is always done first.
+
+    The time taken by each task's steps is measured, and a step is only
+    started if it is expected to finish before the deadline. Tasks whose
+    next step does not fit are skipped in favour of lower priority tasks
+    with shorter steps. A task whose steps take longer than a whole slice
+    is not run again once its first step has been measured, so input is
+    not delayed by background work - the work is done when its result is
+    actually needed instead.
+
+    Properties:
+    slice_time -- time in seconds that run() spends on work when no
+        deadline is given
+    """
+
+    # Weight of the newest measurement in the average step time
+    STEP_TIME_WEIGHT = 0.25
+
+    def __init__(self, slice_time: float) -> None:
+        self.slice_time = slice_time
+
+        self._tasks: List[Tuple[str, Callable[[], bool]]] = []
+
+        # Average time in seconds of one step of each task
+        self._step_times: Dict[str, float] = {}
+
+    def add_task(self, name: str, task: Callable[[], bool]) -> None:
+        """
+        Adds a task with lower priority than all tasks added before it.
+
+        Arguments:
+        name -- name of the task
+        task -- function that does one step of work and returns True, or
+            returns False if there is nothing to do
+        """
+        self._tasks.append((name, task))
+
+    def run(self, deadline: Union[float, None] = None) -> bool:
+        """
+        Runs task steps until the deadline or until no task has anything
+        to do.
+
+        Returns True if any work was done.
+
+        Arguments:
+        deadline -- time.monotonic() value by which work should stop
+            (optional - if None, one slice of slice_time seconds is used)
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.slice_time
+
+        did_work = False
+
+        while True:
+            for name, task in self._tasks:
+                now = time.monotonic()
+                step_time = self._step_times.get(name, 0.0)
+
+                if now + step_time > deadline:
+                    # Not enough time left for this task
+                    continue
+
+                if task():
+                    self._record_step(name, time.monotonic() - now)
+
+                    did_work = True
+
+                    break
+            else:
+                # No task had anything to do
+                return did_work
+
+    def _record_step(self, name: str, elapsed: float) -> None:
+        """Updates the average step time of a task."""
+        if name in self._step_times:
+            self._step_times[name] += IdleScheduler.STEP_TIME_WEIGHT * (
+                elapsed - self._step_times[name])
+        else:
+            self._step_times[name] = elapsed
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
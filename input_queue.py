@@ -0,0 +1,189 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Queue of timestamped player actions and auto-repeat for held inputs
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import time
+
+from collections import deque
+from typing import Any, Hashable, Iterable, Union
+
+
+class InputQueue:
+    """
+    Class representing a bounded queue of timestamped player actions.
+
+    Input is collected into the queue while animations are running so that
+    no presses are lost. When the queue is full, the oldest action is
+    dropped.
+
+    Properties:
+    max_size -- maximum number of actions held in the queue
+    max_age -- actions older than this many seconds are discarded instead
+        of being returned by get() (i.e., type-ahead has a time limit)
+    """
+
+    def __init__(self, max_size: int = 16, max_age: float = 2.0) -> None:
+        self.max_size = max_size
+        self.max_age = max_age
+
+        self._queue = deque(maxlen=max_size)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def put(self, action: Any, timestamp: Union[float, None] = None) -> None:
+        """
+        Adds an action to the end of the queue.
+
+        Arguments:
+        action -- the action to queue
+        timestamp -- time.monotonic() value when the input was received
+            (defaults to now)
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        self._queue.append((timestamp, action))
+
+    def get(self) -> Any:
+        """
+        Removes and returns the oldest action that is not too old, or None
+        if there is no such action.
+        """
+        now = time.monotonic()
+
+        while self._queue:
+            timestamp, action = self._queue.popleft()
+
+            if now - timestamp <= self.max_age:
+                return action
+
+        return None
+
+    def peek(self) -> Any:
+        """
+        Returns the oldest action that is not too old without removing it,
+        or None if there is no such action.
+        """
+        now = time.monotonic()
+
+        while self._queue:
+            timestamp, action = self._queue[0]
+
+            if now - timestamp <= self.max_age:
+                return action
+
+            self._queue.popleft()
+
+        return None
+
+    def take(self, actions: Iterable[Any]) -> bool:
+        """
+        Removes the oldest queued action that is one of the specified
+        actions. Other actions are left in the queue.
+
+        Returns True if a matching action was found.
+        """
+        for entry in self._queue:
+            if entry[1] in actions:
+                self._queue.remove(entry)
+                return True
+
+        return False
+
+    def clear(self) -> None:
+        """Discards all queued actions."""
+        self._queue.clear()
+
+
+class AutoRepeat:
+    """
+    Class that repeats an action while the input that produced it is held
+    down (e.g., a key or a direction on a d-pad).
+
+    Properties:
+    delay -- time in seconds before the first repeat
+    rate -- number of repeats per second after the first repeat (0 to
+        disable auto-repeat)
+    """
+
+    def __init__(self, delay: float = 0.4, rate: float = 10) -> None:
+        self.delay = delay
+        self.rate = rate
+
+        self._action = None
+        self._source = None
+        self._next_time = 0.0
+
+    def press(self, action: Any, source: Hashable) -> None:
+        """
+        Starts repeating an action.
+
+        Arguments:
+        action -- the action to repeat
+        source -- value identifying the held input, used to match the
+            corresponding release
+        """
+        self._action = action
+        self._source = source
+        self._next_time = time.monotonic() + self.delay
+
+    def release(self, source: Hashable) -> None:
+        """Stops repeating if the specified input is the one being held."""
+        if source == self._source:
+            self._action = None
+            self._source = None
+
+    def release_all(self) -> None:
+        """Stops repeating, whichever input is held."""
+        self._action = None
+        self._source = None
+
+    def poll(self, queue: InputQueue) -> None:
+        """
+        Adds the held action to the queue if a repeat is due.
+
+        At most one repeat is added per call, so a slow frame never
+        produces a burst of repeats.
+        """
+        if self._action is None or self.rate <= 0:
+            return
+
+        now = time.monotonic()
+
+        if now >= self._next_time:
+            queue.put(self._action, now)
+
+            self._next_time = now + 1 / self.rate
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
@@ -0,0 +1,134 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Precomputed door layout
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+from typing import List, Tuple
+
+
+class BoardLayout:
+    """
+    Class that computes the size and position of every door once so that
+    drawing and moving the selection need no coordinate math.
+
+    All doors have the same size. Pixels left over when the surface size is
+    not an exact multiple of the number of doors are spread evenly around
+    the doors, so any surface size can be used.
+
+    Properties:
+    width -- width of the surface in pixels
+    height -- height of the surface in pixels
+    doors_horiz -- number of doors across the whole board
+    doors_vert -- number of doors down the whole board
+    visible_horiz -- number of doors across the visible part of the board
+    visible_vert -- number of doors down the visible part of the board
+    margin -- space in pixels between the edge of the surface and the doors
+    gutter -- space in pixels between adjacent doors
+    door_width -- width of each door in pixels
+    door_height -- height of each door in pixels
+    positions -- list of (x, y) coordinates of each visible cell, in
+        row-major order
+    neighbours -- list of (up, down, left, right) door indexes for each door
+        on the whole board (a door is its own neighbour at the edges)
+    has_gaps -- True if any part of the surface is not covered by doors
+    """
+
+    def __init__(
+            self, width: int, height: int, doors_horiz: int, doors_vert: int,
+            visible_horiz: int, visible_vert: int, margin: int = 0,
+            gutter: int = 0) -> None:
+        self.width = width
+        self.height = height
+        self.doors_horiz = doors_horiz
+        self.doors_vert = doors_vert
+        self.visible_horiz = visible_horiz
+        self.visible_vert = visible_vert
+        self.margin = margin
+        self.gutter = gutter
+
+        self.door_width, x_coords = self._spread(width, visible_horiz)
+        self.door_height, y_coords = self._spread(height, visible_vert)
+
+        if self.door_width <= 0 or self.door_height <= 0:
+            raise RuntimeError('surface is too small for the number of '
+                'doors, margin and gutter')
+
+        self.positions = [(x, y) for y in y_coords for x in x_coords]
+
+        self.neighbours = self._build_neighbours()
+
+        self.has_gaps = (
+            self.door_width * visible_horiz != width
+            or self.door_height * visible_vert != height)
+
+    def _spread(self, length: int, count: int) -> Tuple[int, List[int]]:
+        """
+        Returns the door size and the list of door coordinates along one
+        axis of the surface.
+
+        Each door is centered in an equal share of the space left after
+        the margins and gutters.
+        """
+        available = length - self.margin * 2 - self.gutter * (count - 1)
+
+        size = available // count
+        leftover = available - size * count
+
+        coords = [
+            self.margin + i * (size + self.gutter)
+                + (leftover * (2 * i + 1)) // (2 * count)
+            for i in range(count)]
+
+        return size, coords
+
+    def _build_neighbours(self) -> List[Tuple[int, int, int, int]]:
+        """
+        Builds the table of neighbouring doors in each direction for every
+        door on the whole board.
+        """
+        neighbours = []
+
+        for index in range(self.doors_horiz * self.doors_vert):
+            col = index % self.doors_horiz
+            row = index // self.doors_horiz
+
+            up = index - self.doors_horiz if row > 0 else index
+            down = (index + self.doors_horiz
+                if row < self.doors_vert - 1 else index)
+            left = index - 1 if col > 0 else index
+            right = index + 1 if col < self.doors_horiz - 1 else index
+
+            neighbours.append((up, down, left, right))
+
+        return neighbours
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
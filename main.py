@@ -33,6 +33,12 @@ https://github.com/davidsmakerworks/activity-board
 """
 
 
+import time
+
+# Taken before anything else is imported so that the startup report
+# includes the time spent importing modules
+START_TIME = time.monotonic()
+
 import json
 import random
 import sys
@@ -40,7 +46,12 @@ import sys
 import pygame
 
 from activity_board import ActivityBoard
+from asset_cache import AssetCache
+from memory_budget import MemoryReporter
 from screen import Screen
+from startup_timer import StartupTimer
+from text_renderer import TEXT_BACKENDS
+from texture_display import TextureDisplay
 
 
 def main() -> None:
@@ -48,6 +59,9 @@ def main() -> None:
     Main program that does some pygame initialization and runs the
     activity board.
     """
+    timer = StartupTimer(START_TIME)
+    timer.mark('imports')
+
     if len(sys.argv) > 1:
         config_file = sys.argv[1]
     else:
@@ -56,33 +70,256 @@ def main() -> None:
     with open(config_file, 'r') as f:
         config = json.load(f)
 
+    # Optional memory usage report after each game
+    reporter = None
+
+    if config.get('memory', {}).get('report'):
+        reporter = MemoryReporter()
+        reporter.start()
+
+    # Show the blank board before initializing anything else so that the
+    # screen changes as soon as possible after power on
+    pygame.display.init()
+
+    # Need to hide mouse pointer here since the ActivityBoard class
+    # might be used to render on a surface instead of a display
+    pygame.mouse.set_visible(False)
+
+    backend = config['display'].get('backend', 'surface')
+
+    if backend == 'texture':
+        # Draw with GPU textures through the SDL2 Renderer API
+        if config.get('boards'):
+            raise RuntimeError(
+                'texture backend does not support multiple boards')
+
+        screen_surface = TextureDisplay(
+            width=config['display']['width'],
+            height=config['display']['height'],
+            bg_color=pygame.Color(config['board']['bg_color']),
+            fullscreen=config['display']['fullscreen'])
+    elif backend == 'surface':
+        screen = Screen(
+            width=config['display']['width'],
+            height=config['display']['height'],
+            bg_color=pygame.Color(config['board']['bg_color']),
+            fullscreen=config['display']['fullscreen'],
+            depth=config['display'].get('depth', 0))
+
+        screen_surface = screen.surface
+
+        # The driver might not support the requested depth - render door
+        # and activity surfaces at the depth the display actually got
+        depth = config['display'].get('depth', 0)
+
+        if depth and screen.depth != depth:
+            print(f'Display depth {depth} not available, '
+                f'using {screen.depth}')
+
+            config['display']['depth'] = screen.depth
+    else:
+        raise RuntimeError(
+            f'Invalid display backend: {backend} '
+            '(must be "surface" or "texture")')
+
+    text_backend = config['display'].get('text_backend', 'font')
+
+    if text_backend not in TEXT_BACKENDS:
+        raise RuntimeError(
+            f'Invalid text backend: {text_backend} '
+            '(must be "font" or "freetype")')
+
+    timer.mark('first frame')
+
     # Small buffer size to prevent delays when playing sounds
     pygame.mixer.init(buffer=512)
     pygame.init()
 
+    # Optional sound bank holding all sounds, loaded with a single read
+    sound_bank = None
+    bank_config = config.get('sound_bank', {})
+
+    # Modules for optional features are only imported when the feature is
+    # enabled, since some of them (e.g., asyncio, http.server and sqlite3)
+    # take a noticeable time to import on slow devices
+    if bank_config.get('enabled'):
+        from sound_bank import SoundBank
+
+        sound_bank = SoundBank(
+            bank_config.get('file', 'sounds/sounds.bank'))
+
+    # Fonts and sounds are loaded once and reused for every board and
+    # every new game
+    assets = AssetCache(sound_bank=sound_bank)
+
     random.seed()
 
-    # Need to hide mouse pointer here since the ActivityBoard class
-    # might be used to render on a surface instead of a display
-    pygame.mouse.set_visible(False)
+    # Report startup times once the player can make the first move
+    report_startup = config.get('startup', {}).get('report', False)
+
+    def on_board_change(board: ActivityBoard) -> None:
+        if timer.mark('first interactive frame') and report_startup:
+            print(timer.report())
+
+    # Optional remote control server
+    remote = None
+    remote_config = config.get('remote', {})
+
+    if remote_config.get('enabled'):
+        from remote_control import RemoteControlServer
+
+        remote = RemoteControlServer(
+            host=remote_config.get('host', '127.0.0.1'),
+            port=remote_config.get('port', 7777),
+            unix_socket=remote_config.get('unix_socket'))
+        remote.start()
+
+    # Optional session log
+    session_log = None
+    log_config = config.get('session_log', {})
 
-    screen = Screen(
-        width=config['display']['width'],
-        height=config['display']['height'],
-        bg_color=pygame.Color(config['board']['bg_color']),
-        fullscreen=config['display']['fullscreen'])
+    if log_config.get('enabled'):
+        from session_log import SessionLogger
 
-    screen_surface = screen.surface
-    play_again = True
+        session_log = SessionLogger(
+            file=log_config.get('file', 'session_log.jsonl'),
+            log_format=log_config.get('format', 'jsonl'),
+            flush_interval=log_config.get('flush_interval', 1.0))
+        session_log.start()
 
-    while play_again:
-        board = ActivityBoard(
+    # Optional live mirror of the board over HTTP
+    mirror = None
+    mirror_config = config.get('mirror', {})
+
+    if mirror_config.get('enabled'):
+        if backend == 'texture':
+            raise RuntimeError('mirror is not supported by texture backend')
+
+        from board_mirror import BoardMirror
+
+        mirror = BoardMirror(
+            host=mirror_config.get('host', '0.0.0.0'),
+            port=mirror_config.get('port', 8080),
+            max_fps=mirror_config.get('max_fps', 10))
+        mirror.start()
+
+    # Optional copy of the display in shared memory for other processes
+    framebuffer = None
+    framebuffer_config = config.get('framebuffer', {})
+
+    if framebuffer_config.get('enabled'):
+        if backend == 'texture':
+            raise RuntimeError(
+                'framebuffer output is not supported by texture backend')
+
+        from framebuffer_output import FramebufferOutput
+
+        framebuffer = FramebufferOutput(
+            file=framebuffer_config.get(
+                'file', '/dev/shm/activity_board.fb'),
+            width=screen_surface.get_width(),
+            height=screen_surface.get_height())
+        framebuffer.start()
+
+    # Optional snapshots of the game for resuming after a crash or power
+    # loss (single board only)
+    snapshots = None
+    resume = None
+    snapshot_config = config.get('snapshot', {})
+
+    if snapshot_config.get('enabled') and not config.get('boards'):
+        from board_snapshot import SnapshotStore
+
+        snapshots = SnapshotStore(
+            snapshot_config.get('file', 'snapshot.bin'))
+
+        resume = snapshots.load()
+
+        snapshots.start()
+
+    if config.get('boards'):
+        # Several boards in one process sharing one event loop
+        from board_host import BoardHost
+
+        host = BoardHost(
             surface=screen_surface,
             config=config,
             start_hidden=True,
-            surface_is_display=True)
+            surface_is_display=True,
+            remote=remote,
+            session_log=session_log,
+            mirror=mirror,
+            framebuffer=framebuffer,
+            assets=assets)
+
+        host.add_listener(on_board_change)
+
+        host.run()
+
+        if reporter is not None:
+            print(reporter.report(host.boards))
+    else:
+        board = None
+        play_again = True
+
+        while play_again:
+            if board is not None and board.can_reshuffle():
+                # Reuse the doors and cached surfaces from the last game
+                board.reshuffle()
+            else:
+                if board is not None:
+                    # Use any configuration changes loaded during the game
+                    config = board.config
+
+                board = ActivityBoard(
+                    surface=screen_surface,
+                    config=config,
+                    start_hidden=True,
+                    surface_is_display=True,
+                    assets=assets,
+                    config_file=config_file)
+
+                # Continue the game that was interrupted, if any
+                if resume is not None:
+                    board.restore_snapshot(resume)
+                    resume = None
+
+                if snapshots is not None:
+                    snapshots.attach(board)
+
+                if remote is not None:
+                    remote.attach(board)
+
+                if session_log is not None:
+                    session_log.attach(board)
+
+                if mirror is not None:
+                    mirror.attach(board)
+
+                if framebuffer is not None:
+                    framebuffer.attach(board)
+
+                board.add_listener(on_board_change)
+
+            play_again = board.run()
+
+            if reporter is not None:
+                print(reporter.report([board]))
+
+    if remote is not None:
+        remote.stop()
+
+    if session_log is not None:
+        session_log.stop()
+
+    if mirror is not None:
+        mirror.stop()
+
+    if snapshots is not None:
+        snapshots.stop()
 
-        play_again = board.run()
+    if framebuffer is not None:
+        framebuffer.stop()
 
     pygame.quit()
 
@@ -0,0 +1,207 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Memory budget for cached door surfaces and memory usage reporting
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import os
+import tracemalloc
+
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Tuple
+
+import pygame
+
+
+def surface_bytes(surf: pygame.Surface) -> int:
+    """Returns the number of bytes used by the pixels of a surface."""
+    return surf.get_pitch() * surf.get_height()
+
+
+class SurfaceBudget:
+    """
+    Class that limits the total size of cached surfaces, discarding the
+    least recently used surfaces when the limit is exceeded.
+
+    Owners of cached surfaces (e.g., Door objects) call add() when a surface
+    is cached, touch() when a cached surface is used and remove() when a
+    surface is discarded. To evict a surface, the budget calls
+    owner.clear_cache((key,)).
+
+    Properties:
+    max_bytes -- maximum total size of the cached surfaces
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+
+        self._entries: 'OrderedDict[Tuple[object, Hashable], int]' = (
+            OrderedDict())
+        self._total = 0
+
+    @property
+    def total_bytes(self) -> int:
+        """Returns the total size of the surfaces in the budget."""
+        return self._total
+
+    def can_fit(self, size: int) -> bool:
+        """
+        Returns True if a surface of size bytes can be added without
+        evicting any other surface.
+        """
+        return self._total + size <= self.max_bytes
+
+    def add(self, owner: object, key: Hashable, surf: pygame.Surface) -> None:
+        """
+        Adds a newly cached surface as the most recently used one and
+        evicts older surfaces until the total fits in the budget.
+
+        The surface that was just added is never evicted, so a single
+        surface larger than the budget is still cached.
+        """
+        self.remove(owner, key)
+
+        size = surface_bytes(surf)
+
+        self._entries[(owner, key)] = size
+        self._total += size
+
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            (old_owner, old_key), old_size = self._entries.popitem(
+                last=False)
+            self._total -= old_size
+
+            old_owner.clear_cache((old_key,))
+
+    def touch(self, owner: object, key: Hashable) -> None:
+        """Marks a cached surface as the most recently used one."""
+        entry = (owner, key)
+
+        if entry in self._entries:
+            self._entries.move_to_end(entry)
+
+    def remove(self, owner: object, key: Hashable) -> None:
+        """Removes a surface that was discarded by its owner."""
+        size = self._entries.pop((owner, key), None)
+
+        if size is not None:
+            self._total -= size
+
+
+class MemoryReporter:
+    """
+    Class that reports memory usage broken down by subsystem.
+
+    Python allocations are traced with tracemalloc and grouped by the
+    source file that made them. Pixel data of pygame surfaces is allocated
+    outside of Python, so it is reported separately using the surface byte
+    counts supplied by each board (see ActivityBoard.memory_usage()).
+
+    Properties:
+    frames -- number of stack frames stored for each traced allocation
+    """
+
+    def __init__(self, frames: int = 1) -> None:
+        self.frames = frames
+
+    def start(self) -> None:
+        """Starts tracing Python memory allocations."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self) -> None:
+        """Stops tracing Python memory allocations."""
+        tracemalloc.stop()
+
+    def python_usage(self) -> Dict[str, int]:
+        """
+        Returns a dictionary of bytes currently allocated by Python code,
+        keyed by source file (modules outside this program are combined
+        by top-level package).
+        """
+        if not tracemalloc.is_tracing():
+            return {}
+
+        program_dir = os.path.dirname(os.path.abspath(__file__))
+
+        usage: Dict[str, int] = {}
+
+        snapshot = tracemalloc.take_snapshot()
+
+        for stat in snapshot.statistics('filename'):
+            file_name = stat.traceback[0].filename
+
+            if file_name.startswith('<'):
+                # Frozen modules and code compiled from strings
+                name = 'other'
+            elif os.path.dirname(os.path.abspath(file_name)) == program_dir:
+                name = os.path.basename(file_name)
+            elif 'site-packages' in file_name:
+                name = file_name.split('site-packages')[-1].strip(
+                    os.sep).split(os.sep)[0]
+            else:
+                name = 'other'
+
+            usage[name] = usage.get(name, 0) + stat.size
+
+        return usage
+
+    def report(self, boards: List[object]) -> str:
+        """
+        Returns a multi-line report of memory usage.
+
+        Arguments:
+        boards -- objects with a memory_usage() method returning a
+            dictionary of surface bytes by subsystem (e.g., ActivityBoard)
+        """
+        lines = ['Memory usage:']
+
+        for index, board in enumerate(boards):
+            for subsystem, size in board.memory_usage().items():
+                lines.append(
+                    f'  board {index} {subsystem}: {size / 1024:.0f} KiB')
+
+        python_usage = self.python_usage()
+
+        if python_usage:
+            for name, size in sorted(
+                    python_usage.items(), key=lambda item: -item[1]):
+                lines.append(f'  python {name}: {size / 1024:.0f} KiB')
+
+            current, peak = tracemalloc.get_traced_memory()
+
+            lines.append(
+                f'  python total: {current / 1024:.0f} KiB '
+                f'(peak {peak / 1024:.0f} KiB)')
+
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
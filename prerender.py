@@ -0,0 +1,170 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Parallel pre-rendering of door surfaces in a process pool
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import multiprocessing
+import os
+
+from typing import List, Tuple, Union
+
+import pygame
+import pygame.freetype
+
+from asset_cache import AssetCache
+from door import Door, DoorProperties
+
+
+# Door surfaces rendered ahead of time. The selected variants are only
+# needed for one door at a time, so they are left to be rendered on demand.
+PRERENDER_KEYS = ('closed', 'crossed', 'revealed', 'unused')
+
+# Pixel format used to send surfaces between processes
+PIXEL_FORMAT = 'RGB'
+
+# DoorProperties object built once in each worker process
+_worker_props = None
+
+
+def _init_worker(config: dict) -> None:
+    """
+    Initializes a worker process by loading the fonts used by the doors.
+    """
+    global _worker_props
+
+    pygame.font.init()
+    pygame.freetype.init()
+
+    _worker_props = DoorProperties.from_config(config, AssetCache())
+
+
+def _render_door(
+        task: Tuple[int, int, int, str]) -> Tuple[int, List[bytes]]:
+    """
+    Renders the pre-rendered surfaces for one door in a worker process.
+
+    Arguments:
+    task -- tuple of door index, width, height and activity text
+
+    Returns the door index and a list of raw pixel buffers in the same
+    order as PRERENDER_KEYS.
+    """
+    index, width, height, activity = task
+
+    door = Door(
+        index=index,
+        height=height,
+        width=width,
+        activity=activity,
+        props=_worker_props)
+
+    return index, [
+        pygame.image.tostring(door.render_surface(key), PIXEL_FORMAT)
+        for key in PRERENDER_KEYS]
+
+
+class DoorPrerenderer:
+    """
+    Class to render door surfaces in a pool of worker processes and store
+    them in each door's surface cache.
+
+    Workers return raw pixel buffers, which are turned into surfaces on the
+    main thread with pygame.image.frombuffer() and converted to the display
+    format if a display is available.
+
+    Properties:
+    config -- dictionary representing the activity board configuration
+    processes -- number of worker processes (None to use one per CPU core)
+    """
+
+    def __init__(
+            self, config: dict,
+            processes: Union[int, None] = None) -> None:
+        self._config = config
+
+        if processes is None:
+            processes = os.cpu_count() or 1
+
+        self.processes = processes
+
+    def prerender(self, doors: List[Door], props: DoorProperties) -> None:
+        """
+        Renders surfaces for all doors that use the specified (shared)
+        DoorProperties object and stores them in the door caches.
+
+        Doors with their own DoorProperties object are skipped and rendered
+        on demand.
+        """
+        doors = [d for d in doors if d.props is props]
+
+        if not doors:
+            return
+
+        tasks = [(d.index, d.width, d.height, d.activity) for d in doors]
+        doors_by_index = {d.index: d for d in doors}
+
+        # Hide the pygame banner in the worker processes
+        os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+        # Spawn instead of fork so that workers do not inherit the
+        # initialized display and mixer
+        context = multiprocessing.get_context('spawn')
+
+        with context.Pool(
+                processes=self.processes,
+                initializer=_init_worker,
+                initargs=(self._config,)) as pool:
+            for index, buffers in pool.imap_unordered(_render_door, tasks):
+                door = doors_by_index[index]
+
+                for key, buffer in zip(PRERENDER_KEYS, buffers):
+                    door.set_cached_surface(
+                        key, self._to_surface(buffer, door))
+
+    def _to_surface(self, buffer: bytes, door: Door) -> pygame.Surface:
+        """Turns a raw pixel buffer back into a surface."""
+        surf = pygame.image.frombuffer(
+            buffer, (door.width, door.height), PIXEL_FORMAT)
+
+        if door.props.surface_depth:
+            # Copy into a surface at the configured depth (e.g., 16-bit)
+            converted = pygame.Surface(
+                surf.get_size(), 0, door.props.surface_depth)
+            converted.blit(surf, (0, 0))
+
+            surf = converted
+        elif pygame.display.get_surface() is not None:
+            surf = surf.convert()
+
+        return surf
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
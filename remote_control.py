@@ -0,0 +1,250 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Remote control server for driving the board over a local socket
+
+Protocol (one UTF-8 line per message):
+
+Client to server -- an action name from ActivityBoard.Action (e.g., OPEN),
+    optionally followed by a space and the index of the target board, or
+    STATE to request the current state of all boards
+Server to client -- JSON objects: {"ack": "<command>"} as soon as a command
+    is accepted, {"error": "<message>"} for an invalid command and
+    {"event": "state", "board": <index>, ...} whenever a board changes state
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import asyncio
+import json
+import os
+import threading
+
+from typing import Dict, Set, Union
+
+import pygame
+
+from activity_board import ActivityBoard
+
+
+class RemoteControlServer:
+    """
+    Class representing an asyncio server that accepts ActivityBoard actions
+    from a TCP or Unix domain socket and pushes board state changes back
+    to all connected clients.
+
+    The server runs its own event loop in a background thread. Commands are
+    posted to the pygame event queue as ActivityBoard.ACTION_EVENT events,
+    so they are handled by the main loop in the same way as joystick and
+    keyboard input and never block rendering.
+
+    Properties:
+    host -- address to listen on for TCP connections
+    port -- TCP port to listen on
+    unix_socket -- path of a Unix domain socket to listen on instead of TCP
+        (optional)
+    """
+
+    def __init__(
+            self, host: str = '127.0.0.1', port: int = 7777,
+            unix_socket: Union[str, None] = None) -> None:
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+        # Most recent status of each board - only accessed from the server
+        # thread
+        self._status: Dict[int, dict] = {}
+
+        # Indexes of the attached boards - commands for any other index
+        # are rejected
+        self._boards: Set[int] = set()
+
+    def start(self) -> None:
+        """Starts the server in a background thread."""
+        self._thread = threading.Thread(
+            target=self._run_loop, name='remote-control', daemon=True)
+        self._thread.start()
+
+        self._started.wait()
+
+    def stop(self) -> None:
+        """Stops the server and waits for the background thread to exit."""
+        if self._loop is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(
+            self._shutdown(), self._loop).result()
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.remove(self.unix_socket)
+
+    def attach(self, board: ActivityBoard, index: int = 0) -> None:
+        """
+        Registers the server as a listener on the board so that state
+        changes are pushed to connected clients.
+
+        Arguments:
+        board -- the ActivityBoard to report on
+        index -- index of the board (i.e., target for commands that include
+            a board index)
+        """
+        self._boards.add(index)
+
+        board.add_listener(lambda b: self._publish(index, b.get_status()))
+
+    def _publish(self, index: int, status: dict) -> None:
+        """
+        Sends a board status to all clients. Called from the main loop, so
+        the actual writes are handed off to the server thread.
+        """
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._broadcast, index, status)
+
+    def _broadcast(self, index: int, status: dict) -> None:
+        """Writes a state event to every connected client."""
+        self._status[index] = status
+
+        message = self._encode(dict(event='state', board=index, **status))
+
+        for writer in list(self._writers):
+            writer.write(message)
+
+    def _encode(self, message: dict) -> bytes:
+        """Encodes a message as one line of JSON."""
+        return (json.dumps(message) + '\n').encode('utf-8')
+
+    async def _shutdown(self) -> None:
+        """Stops accepting connections and disconnects all clients."""
+        self._server.close()
+
+        for writer in list(self._writers):
+            writer.close()
+
+        tasks = [t for t in asyncio.all_tasks(self._loop)
+            if t is not asyncio.current_task(self._loop)]
+
+        # Closing the writers ends each client handler at its next read
+        if tasks:
+            await asyncio.wait(tasks, timeout=1)
+
+    def _run_loop(self) -> None:
+        """Runs the asyncio event loop (in the background thread)."""
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        if self.unix_socket:
+            if os.path.exists(self.unix_socket):
+                os.remove(self.unix_socket)
+
+            coro = asyncio.start_unix_server(
+                self._handle_client, path=self.unix_socket)
+        else:
+            coro = asyncio.start_server(
+                self._handle_client, host=self.host, port=self.port)
+
+        self._server = self._loop.run_until_complete(coro)
+        self._started.set()
+
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _handle_client(
+            self, reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter) -> None:
+        """Handles commands from one connected client."""
+        self._writers.add(writer)
+
+        try:
+            while True:
+                line = await reader.readline()
+
+                if not line:
+                    break
+
+                writer.write(self._handle_command(line.decode('utf-8')))
+
+                await writer.drain()
+        except (ConnectionError, UnicodeDecodeError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _handle_command(self, line: str) -> bytes:
+        """
+        Parses one command line and posts the action to the pygame event
+        queue. Returns the encoded reply.
+        """
+        parts = line.split()
+
+        if not parts:
+            return self._encode({'error': 'empty command'})
+
+        command = parts[0].upper()
+
+        if command == 'STATE':
+            if not self._status:
+                return self._encode({'error': 'no board running'})
+
+            return b''.join(
+                self._encode(dict(event='state', board=index, **status))
+                for index, status in sorted(self._status.items()))
+
+        try:
+            action = ActivityBoard.Action[command]
+        except KeyError:
+            return self._encode({'error': f'unknown action: {parts[0]}'})
+
+        try:
+            board = int(parts[1]) if len(parts) > 1 else 0
+        except ValueError:
+            return self._encode({'error': f'invalid board: {parts[1]}'})
+
+        if board not in self._boards:
+            return self._encode({'error': f'no such board: {board}'})
+
+        pygame.event.post(pygame.event.Event(
+            ActivityBoard.ACTION_EVENT, action=action, board=board))
+
+        return self._encode({'ack': command})
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
@@ -0,0 +1,189 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Load-test client for the remote control server
+
+Sends a series of navigation commands to a running board (start main.py
+with "remote" enabled in the configuration) and reports round-trip
+latency, both to the server acknowledgement and to the resulting state
+update from the main loop.
+
+The board must be waiting for a door to be selected. The test stops
+with an error if the server does not reply within the timeout.
+
+Usage: remote_load_test.py [--host HOST] [--port PORT] [--unix PATH]
+    [--count N] [--board INDEX] [--timeout SECONDS]
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import argparse
+import json
+import socket
+import statistics
+import sys
+import time
+
+from typing import List
+
+
+# Target round-trip latency in milliseconds
+TARGET_MS = 20
+
+
+def read_message(f) -> dict:
+    """Reads one JSON message line from the server."""
+    line = f.readline()
+
+    if not line:
+        raise ConnectionError('server closed the connection')
+
+    return json.loads(line)
+
+
+def read_board_state(f, board: int) -> str:
+    """Asks the server for the state of a board and returns it."""
+    f.write('STATE\n')
+    f.flush()
+
+    while True:
+        message = read_message(f)
+
+        if 'error' in message:
+            raise RuntimeError(message['error'])
+
+        if (message.get('event') == 'state'
+                and message.get('board') == board):
+            return message['state']
+
+
+def report(name: str, samples: List[float]) -> bool:
+    """
+    Prints latency statistics in milliseconds and returns True if the
+    95th percentile is under the target.
+    """
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    print(f'{name}: min {samples[0]:.2f} ms, '
+        f'median {statistics.median(samples):.2f} ms, '
+        f'p95 {p95:.2f} ms, max {samples[-1]:.2f} ms')
+
+    return p95 < TARGET_MS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Measure remote control round-trip latency.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--unix', help='Unix domain socket path')
+    parser.add_argument('--count', type=int, default=200)
+    parser.add_argument('--board', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=5.0)
+    args = parser.parse_args()
+
+    try:
+        run_test(args)
+    except socket.timeout:
+        print(f'No reply from the server within {args.timeout} seconds')
+        sys.exit(1)
+    except OSError as e:
+        print(f'Connection error: {e}')
+        sys.exit(1)
+    except RuntimeError as e:
+        print(f'Server error: {e}')
+        sys.exit(1)
+
+
+def run_test(args: argparse.Namespace) -> None:
+    """Runs the load test with the parsed command line arguments."""
+    if args.unix:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(args.unix)
+    else:
+        sock = socket.create_connection((args.host, args.port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    sock.settimeout(args.timeout)
+
+    f = sock.makefile('rw', encoding='utf-8', newline='\n')
+
+    # Navigation commands only change the state while selecting a door
+    state = read_board_state(f, args.board)
+
+    if state != 'SELECTING':
+        print(f'Board {args.board} is not waiting for a door to be '
+            f'selected (state {state})')
+        sys.exit(1)
+
+    ack_times = []
+    state_times = []
+
+    # Alternate directions so the selection stays near the first door
+    commands = ['RIGHT', 'LEFT']
+
+    for i in range(args.count):
+        command = commands[i % len(commands)]
+
+        start = time.perf_counter()
+
+        f.write(f'{command} {args.board}\n')
+        f.flush()
+
+        got_ack = False
+        got_state = False
+
+        while not (got_ack and got_state):
+            message = read_message(f)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            if 'error' in message:
+                print(f'Server error: {message["error"]}')
+                sys.exit(1)
+            elif 'ack' in message and not got_ack:
+                ack_times.append(elapsed)
+                got_ack = True
+            elif (message.get('event') == 'state'
+                    and message.get('board') == args.board):
+                state_times.append(elapsed)
+                got_state = True
+
+    sock.close()
+
+    ack_ok = report('Acknowledgement', ack_times)
+    state_ok = report('State update', state_times)
+
+    if ack_ok and state_ok:
+        print(f'PASS: p95 round trip under {TARGET_MS} ms')
+    else:
+        print(f'FAIL: p95 round trip not under {TARGET_MS} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -45,12 +45,17 @@ class Screen:
     bg_color -- pygame Color object representing the background color to use
     fullscreen -- boolean representing whether full-screen display
         should be used
+    depth -- color depth in bits per pixel (e.g., 16 for RGB565 to halve
+        memory bandwidth on Raspberry Pi) or 0 to let pygame choose. After
+        initialization this is the depth the display actually got, which
+        can differ from the requested depth.
     """
     def __init__(
             self, width: int, height: int, bg_color: pygame.Color,
-            fullscreen: bool = False) -> None:
+            fullscreen: bool = False, depth: int = 0) -> None:
         self.width = width
         self.height = height
+        self.depth = depth
 
         if fullscreen:
             flags = pygame.FULLSCREEN
@@ -58,7 +63,9 @@ class Screen:
             flags = None
 
         self.surface = pygame.display.set_mode(
-                (self.width, self.height), flags)
+                (self.width, self.height), flags, self.depth)
+
+        self.depth = self.surface.get_bitsize()
 
         self.surface.fill(bg_color)
 
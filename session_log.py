@@ -0,0 +1,299 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Session log recording games, opened doors and reveals in the background
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from typing import Dict, List, Union
+
+from activity_board import ActivityBoard
+
+
+class SessionLogger:
+    """
+    Class representing a log of activity board sessions written by a
+    background thread.
+
+    Boards report state changes to the logger through listeners (see
+    attach()). The listener only puts a small record on a queue, so no file
+    I/O ever happens in the main loop. The writer thread collects records
+    into batches and writes each batch in one operation, followed by an
+    fsync, so at most flush_interval seconds of records are lost if power
+    fails.
+
+    Each record has these fields:
+
+    time -- wall clock time of the event (seconds since the epoch)
+    board -- index of the board
+    event -- one of game_start, door_open, door_return, reveal_all or
+        game_over
+    door -- index of the door (door_open and door_return only)
+    activity -- text of the activity (door_open and door_return only)
+    duration -- seconds that the activity was shown (door_return only)
+
+    Properties:
+    file -- path of the log file
+    log_format -- "jsonl" (one JSON object per line) or "sqlite" (rows in
+        an "events" table)
+    flush_interval -- maximum number of seconds between writes
+    batch_size -- number of records that causes an immediate write
+    """
+
+    FORMATS = ('jsonl', 'sqlite')
+
+    FIELDS = ('time', 'board', 'event', 'door', 'activity', 'duration')
+
+    def __init__(
+            self, file: str, log_format: str = 'jsonl',
+            flush_interval: float = 1.0, batch_size: int = 64) -> None:
+        if log_format not in SessionLogger.FORMATS:
+            raise RuntimeError(f'Invalid session log format: {log_format}')
+
+        self.file = file
+        self.log_format = log_format
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        # SimpleQueue.put() never blocks, so logging cannot stall the
+        # main loop
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+        # Set by the writer thread if the log cannot be written - no more
+        # records are queued after that
+        self._failed = False
+
+        # Only accessed from the writer thread
+        self._file = None
+        self._db = None
+
+        # Last reported state and open time of each board - only accessed
+        # from the main loop
+        self._last_state: Dict[int, ActivityBoard.State] = {}
+        self._open_time: Dict[int, float] = {}
+
+    def start(self) -> None:
+        """Starts the writer thread."""
+        self._thread = threading.Thread(
+            target=self._run, name='session-log', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Writes all remaining records and waits for the writer thread to
+        exit.
+        """
+        if self._thread is None:
+            return
+
+        self._queue.put(None)
+        self._thread.join()
+
+        self._thread = None
+
+    def attach(self, board: ActivityBoard, index: int = 0) -> None:
+        """
+        Registers the logger as a listener on the board.
+
+        Arguments:
+        board -- the ActivityBoard to record
+        index -- index of the board (written to each record)
+        """
+        # A new or reshuffled board always starts from the START state
+        self._last_state[index] = None
+
+        board.add_listener(lambda b: self._on_change(index, b))
+
+    def _on_change(self, index: int, board: ActivityBoard) -> None:
+        """
+        Records the events implied by a change of board state. Called from
+        the main loop.
+        """
+        now = time.time()
+
+        state = board.state
+        last_state = self._last_state.get(index)
+
+        if state is last_state:
+            return
+
+        self._last_state[index] = state
+
+        if state is ActivityBoard.State.SELECTING:
+            if last_state is ActivityBoard.State.IN_PROGRESS:
+                self._log(
+                    now, index, 'door_return', board.selected_index,
+                    board.selected_activity,
+                    now - self._open_time.pop(index, now))
+            else:
+                self._log(now, index, 'game_start')
+        elif state is ActivityBoard.State.IN_PROGRESS:
+            self._open_time[index] = now
+
+            self._log(
+                now, index, 'door_open', board.selected_index,
+                board.selected_activity)
+        elif state is ActivityBoard.State.ALL_REVEALED:
+            self._log(now, index, 'reveal_all')
+        elif state is ActivityBoard.State.GAME_OVER:
+            self._log(now, index, 'game_over')
+
+            # The next game on this board starts from the START state
+            self._last_state[index] = None
+
+    def _log(
+            self, timestamp: float, board: int, event: str,
+            door: Union[int, None] = None,
+            activity: Union[str, None] = None,
+            duration: Union[float, None] = None) -> None:
+        """Adds one record to the queue for the writer thread."""
+        if self._failed:
+            return
+
+        self._queue.put((timestamp, board, event, door, activity, duration))
+
+    def _run(self) -> None:
+        """Main function of the writer thread."""
+        try:
+            try:
+                self._write_batches(self._open())
+            finally:
+                self._close()
+        except (OSError, sqlite3.Error) as e:
+            # The log is a convenience - never stop the game
+            print(f'Unable to write session log: {e}')
+
+            self._failed = True
+
+            # Discard the records that will never be written
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _write_batches(self, writer) -> None:
+        """
+        Collects records into batches and writes each batch with writer
+        until stop() is called. Called from the writer thread.
+        """
+        running = True
+
+        while running:
+            batch: List[tuple] = []
+            deadline = None
+
+            while len(batch) < self.batch_size:
+                # Wait indefinitely for the first record of a batch,
+                # then at most until the flush deadline
+                if deadline is None:
+                    timeout = None
+                else:
+                    timeout = deadline - time.monotonic()
+
+                    if timeout <= 0:
+                        break
+
+                try:
+                    record = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+                if record is None:
+                    running = False
+                    break
+
+                batch.append(record)
+
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch:
+                writer(batch)
+
+    def _open(self):
+        """
+        Opens the log file and returns the function that writes one batch.
+        Called from the writer thread.
+        """
+        if self.log_format == 'sqlite':
+            self._db = sqlite3.connect(self.file)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=FULL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS events (time REAL, '
+                'board INTEGER, event TEXT, door INTEGER, activity TEXT, '
+                'duration REAL)')
+            self._db.commit()
+
+            return self._write_sqlite
+
+        self._file = open(self.file, 'a', encoding='utf-8')
+
+        return self._write_jsonl
+
+    def _close(self) -> None:
+        """Closes the log file, if open. Called from the writer thread."""
+        if self._db is not None:
+            self._db.close()
+
+        if self._file is not None:
+            self._file.close()
+
+    def _write_jsonl(self, batch: List[tuple]) -> None:
+        """Appends a batch of records to the JSONL file."""
+        lines = []
+
+        for record in batch:
+            entry = {key: value for key, value
+                in zip(SessionLogger.FIELDS, record) if value is not None}
+
+            lines.append(json.dumps(entry) + '\n')
+
+        self._file.write(''.join(lines))
+        self._file.flush()
+
+        os.fsync(self._file.fileno())
+
+    def _write_sqlite(self, batch: List[tuple]) -> None:
+        """Inserts a batch of records into the SQLite database."""
+        with self._db:
+            self._db.executemany(
+                'INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)', batch)
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
@@ -0,0 +1,184 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Packed sound bank holding every sound effect as decoded PCM data
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import json
+import os
+import struct
+
+from typing import Dict, Iterable
+
+import pygame
+
+
+# Identifies a sound bank file and its format version
+MAGIC = b'ASBBANK1'
+
+# Magic followed by the length of the JSON index in bytes
+HEADER_FORMAT = '<8sI'
+
+# Sound data starts at a multiple of this many bytes from the start of
+# the file and each sound starts at a multiple of this many bytes after it
+ALIGNMENT = 16
+
+
+def _align(value: int) -> int:
+    """Rounds value up to the next multiple of ALIGNMENT."""
+    return (value + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def build_sound_bank(file_names: Iterable[str], output: str) -> int:
+    """
+    Decodes sound files with the mixer and writes them to a sound bank
+    file. The mixer must already be initialized with the settings that
+    will be used when the bank is loaded.
+
+    Returns the number of sounds written.
+
+    Arguments:
+    file_names -- names of the sound files to include, which are also the
+        names used to look up the sounds in the bank
+    output -- name of the sound bank file to write
+    """
+    mixer_format = pygame.mixer.get_init()
+
+    if mixer_format is None:
+        raise RuntimeError('mixer must be initialized to build sound bank')
+
+    sounds = {}
+    chunks = []
+    offset = 0
+
+    for file_name in dict.fromkeys(file_names):
+        raw = pygame.mixer.Sound(file_name).get_raw()
+
+        sounds[file_name] = [offset, len(raw)]
+        chunks.append(raw)
+
+        offset = _align(offset + len(raw))
+
+    frequency, size, channels = mixer_format
+
+    index = json.dumps({
+        'frequency': frequency,
+        'size': size,
+        'channels': channels,
+        'sounds': sounds
+    }).encode('utf-8')
+
+    header_size = struct.calcsize(HEADER_FORMAT) + len(index)
+    data_start = _align(header_size)
+
+    # Write to a temporary file and replace the old bank in one step so
+    # that a running board never sees a partly written file
+    temp_name = output + '.tmp'
+
+    with open(temp_name, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, len(index)))
+        f.write(index)
+        f.write(bytes(data_start - header_size))
+
+        for raw in chunks:
+            f.write(raw)
+            f.write(bytes(_align(len(raw)) - len(raw)))
+
+    os.replace(temp_name, output)
+
+    return len(sounds)
+
+
+class SoundBank:
+    """
+    Class to load every sound in a sound bank file with a single read and
+    create pygame Sound objects from slices of the loaded data.
+
+    pygame copies the data into each Sound object, so all sounds are
+    created when the bank is loaded and the file data is not kept.
+
+    The sound data is stored in the format used by the mixer, so it does
+    not need to be decoded again. The bank must be rebuilt with
+    build_sound_bank.py if the mixer settings change.
+
+    Properties:
+    file_name -- name of the sound bank file
+    """
+
+    def __init__(self, file_name: str) -> None:
+        """
+        Loads the sound bank. The mixer must already be initialized.
+        """
+        self.file_name = file_name
+
+        with open(file_name, 'rb') as f:
+            data = memoryview(f.read())
+
+        header_size = struct.calcsize(HEADER_FORMAT)
+
+        magic, index_size = struct.unpack_from(HEADER_FORMAT, data)
+
+        if magic != MAGIC:
+            raise RuntimeError(f'{file_name} is not a sound bank file')
+
+        index = json.loads(
+            bytes(data[header_size:header_size + index_size]))
+
+        bank_format = (index['frequency'], index['size'], index['channels'])
+
+        if bank_format != pygame.mixer.get_init():
+            raise RuntimeError(
+                f'sound bank {file_name} was built for mixer format '
+                f'{bank_format} but mixer is {pygame.mixer.get_init()} '
+                '- rebuild it with build_sound_bank.py')
+
+        data_start = _align(header_size + index_size)
+
+        # The data is passed to pygame as a slice of the loaded file, so it
+        # is not copied again in Python
+        self._sounds: Dict[str, pygame.mixer.Sound] = {
+            name: pygame.mixer.Sound(buffer=data[
+                data_start + offset:data_start + offset + length])
+            for name, (offset, length) in index['sounds'].items()}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sounds
+
+    def get_sound(self, name: str) -> pygame.mixer.Sound:
+        """
+        Returns the pygame Sound object for the named sound.
+
+        Arguments:
+        name -- name of the sound file the sound was built from
+        """
+        return self._sounds[name]
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
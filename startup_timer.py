@@ -0,0 +1,85 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Timer for measuring how long the board takes to start
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import time
+
+from typing import Dict, Union
+
+
+class StartupTimer:
+    """
+    Class that records the time from program start to named milestones
+    (e.g., the first frame shown and the first frame where the player can
+    make a move).
+
+    Properties:
+    start_time -- time.monotonic() value when the program started
+    """
+
+    def __init__(self, start_time: Union[float, None] = None) -> None:
+        if start_time is None:
+            start_time = time.monotonic()
+
+        self.start_time = start_time
+
+        self._marks: Dict[str, float] = {}
+
+    def mark(self, name: str) -> bool:
+        """
+        Records the elapsed time for a milestone. Only the first call for
+        each name is recorded.
+
+        Returns True if the milestone was recorded by this call.
+        """
+        if name in self._marks:
+            return False
+
+        self._marks[name] = time.monotonic() - self.start_time
+
+        return True
+
+    def elapsed(self, name: str) -> Union[float, None]:
+        """
+        Returns the seconds from program start to a milestone, or None if
+        the milestone has not been reached.
+        """
+        return self._marks.get(name)
+
+    def report(self) -> str:
+        """Returns a one-line summary of all recorded milestones."""
+        return 'Startup: ' + ', '.join(
+            f'{name} {seconds * 1000:.0f} ms'
+            for name, seconds in self._marks.items())
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
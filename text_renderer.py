@@ -30,73 +30,174 @@ https://github.com/davidsmakerworks/activity-board
 """
 
 
+from typing import Iterator, List, Tuple, Union
+
 import pygame
+import pygame.freetype
+
+
+TEXT_BACKENDS = ('font', 'freetype')
 
 
 class TextRenderer:
     """
     Class to assist with rendering text surfaces.
 
+    The font can be a pygame.font.Font object or a pygame.freetype.Font
+    object. Freetype fonts keep rendered glyphs in a cache and draw each
+    line straight onto the target surface.
+
     Properties:
-    font -- pygame Font object used to render text
+    font -- pygame Font or freetype Font object used to render text
     line_spacing -- space (in pixels) between text lines
     text_color -- pygame Color object representing text color
+    depth -- color depth in bits per pixel of the rendered surface (0 for
+        the default depth)
     """
 
     def __init__(
-            self, font: pygame.font.Font, line_spacing: int,
-            text_color: pygame.Color) -> None:
+            self, font: Union[pygame.font.Font, pygame.freetype.Font],
+            line_spacing: int, text_color: pygame.Color,
+            depth: int = 0) -> None:
         """
         Create instance using properties as shown in class documentation.
         """
         self.font = font
         self.line_spacing = line_spacing
         self.text_color = text_color
+        self.depth = depth
 
-    def render_surface(self, text: str) -> pygame.Surface:
+        self._freetype = isinstance(font, pygame.freetype.Font)
+
+        if self._freetype:
+            # Place each line by its baseline so that lines with and without
+            # descenders are spaced the same way as with pygame.font
+            self.font.origin = True
+
+    def _measure_lines(
+            self, text_lines: List[str]) -> List[Tuple[int, int]]:
         """
-        Returns a pygame Surface with the specified text rendered on it.
+        Returns the width and height of each line of text without
+        rendering it.
+        """
+        if not self._freetype:
+            return [self.font.size(line) for line in text_lines]
 
-        Size of the surface is minimum size necessary to fully contain text.
+        line_height = (self.font.get_sized_ascender()
+            - self.font.get_sized_descender())
+
+        return [(self.font.get_rect(line).width, line_height)
+            for line in text_lines]
+
+    def get_size(self, text: str) -> Tuple[int, int]:
+        """
+        Returns the width and height needed to render the specified text.
 
         Arguments:
+        text -- text string with newlines represented as backticks (`)
+        """
+        sizes = self._measure_lines(text.split('`'))
+
+        max_width = max(width for width, _ in sizes)
+        total_height = (sum(height for _, height in sizes)
+            + (len(sizes) - 1) * self.line_spacing)
+
+        return max_width, total_height
+
+    def render_to(
+            self, surface: pygame.Surface, center: Tuple[int, int],
+            text: str) -> pygame.Rect:
+        """
+        Draws the specified text directly onto a surface with each line
+        centered horizontally and the whole block centered on a point.
+
+        Returns a pygame Rect covering the text block.
+
+        Arguments:
+        surface -- pygame Surface to draw on
+        center -- point on the surface at which to center the text
         text -- text string to be rendered with newlines represented as
             backticks (`)
-        
-        TODO: Implement word wrap.
         """
-        text_lines = text.split('`')
+        for block_rect in self.render_lines_to(surface, center, text):
+            pass
 
-        text_surfaces = []
+        return block_rect
 
-        for line in text_lines:
-            text_surfaces.append(self.font.render(line, True, self.text_color))
+    def render_lines_to(
+            self, surface: pygame.Surface, center: Tuple[int, int],
+            text: str) -> Iterator[pygame.Rect]:
+        """
+        Draws text in the same way as render_to(), one line per step.
 
-        total_height = 0
-        max_width = 0
+        This is a generator that yields a pygame Rect covering the whole
+        text block after each line is drawn, so that drawing long text can
+        be spread over several calls (e.g., between checks for input).
 
-        for ts in text_surfaces:
-            size = ts.get_rect()
+        Arguments:
+        surface -- pygame Surface to draw on
+        center -- point on the surface at which to center the text
+        text -- text string to be rendered with newlines represented as
+            backticks (`)
+        """
+        text_lines = text.split('`')
+        sizes = self._measure_lines(text_lines)
+
+        max_width = max(width for width, _ in sizes)
+        total_height = (sum(height for _, height in sizes)
+            + (len(sizes) - 1) * self.line_spacing)
 
-            total_height += size.height
+        block_rect = pygame.Rect(
+            center[0] - (max_width // 2),
+            center[1] - (total_height // 2),
+            max_width,
+            total_height)
 
-            if size.width > max_width:
-                max_width = size.width
+        y = block_rect.top
 
-        total_height += (len(text_surfaces) - 1) * self.line_spacing
+        for line, (width, height) in zip(text_lines, sizes):
+            x = block_rect.left + (max_width - width) // 2
 
-        text_surface = pygame.Surface((max_width, total_height))
+            if self._freetype:
+                if line:
+                    # Offset by the left bearing so that the visible text,
+                    # rather than the origin, is centered
+                    self.font.render_to(
+                        surface,
+                        (x - self.font.get_rect(line).x,
+                        y + self.font.get_sized_ascender()),
+                        line,
+                        self.text_color)
+            else:
+                surface.blit(
+                    self.font.render(line, True, self.text_color), (x, y))
 
-        y = 0
+            y = y + height + self.line_spacing
 
-        for ts in text_surfaces:
-            line_rect = ts.get_rect()
+            yield block_rect
 
-            line_rect.center = (max_width // 2, line_rect.height // 2)
+    def render_surface(self, text: str) -> pygame.Surface:
+        """
+        Returns a pygame Surface with the specified text rendered on it.
+
+        Size of the surface is minimum size necessary to fully contain text.
+        Use render_to() instead to draw text onto an existing surface
+        without creating an intermediate surface.
+
+        Arguments:
+        text -- text string to be rendered with newlines represented as
+            backticks (`)
+        
+        TODO: Implement word wrap.
+        """
+        size = self.get_size(text)
 
-            text_surface.blit(ts, ((max_width - line_rect.width) // 2, y))
+        if self.depth:
+            text_surface = pygame.Surface(size, 0, self.depth)
+        else:
+            text_surface = pygame.Surface(size)
 
-            y = y + line_rect.height + self.line_spacing
+        self.render_to(text_surface, (size[0] // 2, size[1] // 2), text)
 
         return text_surface
 
@@ -0,0 +1,190 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Display that draws with GPU textures through the SDL2 Renderer API
+
+Requires pygame 2 (uses pygame._sdl2.video).
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+import weakref
+
+from typing import Tuple, Union
+
+import pygame
+
+try:
+    from pygame._sdl2 import video
+except ImportError:
+    video = None
+
+
+def texture_display_available() -> bool:
+    """Returns True if the SDL2 Renderer API is available."""
+    return video is not None
+
+
+class TextureDisplay:
+    """
+    Class representing a window drawn with the SDL2 Renderer API.
+
+    It provides the parts of the pygame Surface interface used by
+    ActivityBoard (fill(), blit() and the size methods), so a board can draw
+    to it in place of the display surface. Each surface passed to blit() is
+    uploaded to a GPU texture the first time it is drawn and the texture is
+    reused for as long as the surface exists, so cached door surfaces are
+    uploaded only once. Clipping (the area argument of blit()) is done by
+    the GPU when the texture is copied.
+
+    Drawing goes to a target texture that keeps its contents between
+    frames, like the display surface. update() copies it to the window and
+    presents it.
+
+    Call refresh() after changing the pixels of a surface that has already
+    been drawn (e.g., the reused frame surface of a door transition).
+
+    Properties:
+    width -- window width in pixels
+    height -- window height in pixels
+    bg_color -- pygame Color object representing the background color to use
+    fullscreen -- boolean representing whether full-screen display
+        should be used
+    """
+
+    # SDL_BLENDMODE_BLEND (alpha blending) for Texture.blend_mode
+    BLENDMODE_BLEND = 1
+
+    def __init__(
+            self, width: int, height: int, bg_color: pygame.Color,
+            fullscreen: bool = False) -> None:
+        if video is None:
+            raise RuntimeError('texture display requires pygame 2')
+
+        self.width = width
+        self.height = height
+
+        self._window = video.Window(
+            'Activity Board', size=(width, height), fullscreen=fullscreen)
+        self._renderer = video.Renderer(self._window)
+
+        self._canvas = video.Texture(
+            self._renderer, (width, height), target=True)
+        self._renderer.target = self._canvas
+
+        # Textures are released when the surface they were uploaded from
+        # is garbage collected (e.g., evicted from a door cache)
+        self._textures = weakref.WeakKeyDictionary()
+
+        self.fill(bg_color)
+        self.update()
+
+    def get_size(self) -> Tuple[int, int]:
+        """Returns the size of the window."""
+        return self.width, self.height
+
+    def get_width(self) -> int:
+        """Returns the width of the window."""
+        return self.width
+
+    def get_height(self) -> int:
+        """Returns the height of the window."""
+        return self.height
+
+    def _get_texture(self, surf: pygame.Surface) -> 'video.Texture':
+        """Returns the texture for a surface, uploading it if necessary."""
+        texture = self._textures.get(surf)
+
+        if texture is None:
+            texture = video.Texture.from_surface(self._renderer, surf)
+            self._textures[surf] = texture
+
+        alpha = surf.get_alpha()
+
+        if alpha is not None and not surf.get_flags() & pygame.SRCALPHA:
+            # Surface-wide transparency (e.g., the idle dimming overlay)
+            texture.alpha = alpha
+            texture.blend_mode = TextureDisplay.BLENDMODE_BLEND
+
+        return texture
+
+    def refresh(self, surf: pygame.Surface) -> None:
+        """
+        Uploads the pixels of a surface again if it has a texture.
+        """
+        texture = self._textures.get(surf)
+
+        if texture is not None:
+            texture.update(surf)
+
+    def fill(
+            self, color: pygame.Color,
+            rect: Union[pygame.Rect, None] = None) -> None:
+        """Fills the window (or part of it) with a color."""
+        self._renderer.draw_color = pygame.Color(color)
+
+        if rect is None:
+            self._renderer.clear()
+        else:
+            self._renderer.fill_rect(pygame.Rect(rect))
+
+    def blit(
+            self, source: pygame.Surface, dest: Tuple[int, int],
+            area: Union[pygame.Rect, None] = None) -> None:
+        """
+        Draws a surface (or the part of it given by area) at the position
+        given by dest.
+        """
+        texture = self._get_texture(source)
+
+        if area is None:
+            area = source.get_rect()
+        else:
+            area = pygame.Rect(area)
+
+        texture.draw(
+            srcrect=area,
+            dstrect=pygame.Rect(dest[0], dest[1], area.width, area.height))
+
+    def texture_bytes(self) -> int:
+        """
+        Returns the approximate GPU memory used by the uploaded textures
+        and the target texture (assuming 4 bytes per pixel).
+        """
+        return 4 * (self.width * self.height + sum(
+            t.width * t.height for t in self._textures.values()))
+
+    def update(self) -> None:
+        """Shows the contents of the target texture in the window."""
+        self._renderer.target = None
+        self._canvas.draw()
+        self._renderer.present()
+        self._renderer.target = self._canvas
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')
@@ -0,0 +1,173 @@
+# MIT License
+
+# Copyright (c) 2021 David Rice
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+"""
+Activity Selection Board
+
+Vectorized door transition effects
+
+Requires NumPy (used through pygame.surfarray), which is only imported
+when a transition other than "reveal" is used.
+
+https://github.com/davidsmakerworks/activity-board
+"""
+
+
+from typing import Dict, Tuple
+
+import pygame
+
+# Imported by transitions_available() - importing NumPy takes a noticeable
+# part of the startup time on slow devices
+numpy = None
+
+
+# "reveal" is the original growing rectangle drawn by Door itself and does
+# not need NumPy
+TRANSITION_EFFECTS = ('reveal', 'crossfade', 'wipe', 'iris', 'dissolve')
+
+# Per-pixel order maps shared by all doors of the same size
+_order_cache: Dict[Tuple[str, int, int], 'numpy.ndarray'] = {}
+
+
+def transitions_available() -> bool:
+    """
+    Returns True if NumPy is installed so that transitions can be used.
+    NumPy is imported by the first call.
+    """
+    global numpy
+
+    if numpy is None:
+        try:
+            import numpy as _numpy
+            import pygame.surfarray
+        except ImportError:
+            return False
+
+        numpy = _numpy
+
+    return True
+
+
+def _get_order(effect: str, width: int, height: int) -> 'numpy.ndarray':
+    """
+    Returns a width x height array with a value between 0 and 1 for each
+    pixel. A pixel switches to the new image once the progress of the
+    transition passes its value.
+    """
+    key = (effect, width, height)
+
+    if key in _order_cache:
+        return _order_cache[key]
+
+    x = numpy.arange(width, dtype=numpy.float32)[:, None]
+    y = numpy.arange(height, dtype=numpy.float32)[None, :]
+
+    if effect == 'wipe':
+        order = numpy.broadcast_to(x / width, (width, height))
+    elif effect == 'iris':
+        distance = numpy.hypot(x - width / 2, y - height / 2)
+        order = distance / (distance.max() + 1)
+    elif effect == 'dissolve':
+        order = numpy.random.permutation(width * height).reshape(
+            width, height) / (width * height)
+    else:
+        raise ValueError(f'unknown transition effect: {effect}')
+
+    order = numpy.ascontiguousarray(order, dtype=numpy.float32)
+
+    _order_cache[key] = order
+
+    return order
+
+
+class DoorTransition:
+    """
+    Class representing a transition between two door surfaces of the same
+    size.
+
+    The pixels of both surfaces are copied into arrays once, so each frame
+    is a single vectorized operation written into one reused surface.
+
+    Properties:
+    effect -- one of the names in TRANSITION_EFFECTS other than "reveal"
+    before -- surface shown at the start of the transition
+    after -- surface shown at the end of the transition
+    """
+
+    def __init__(
+            self, effect: str, before: pygame.Surface,
+            after: pygame.Surface) -> None:
+        if not transitions_available():
+            raise RuntimeError('door transitions require NumPy')
+
+        self.effect = effect
+
+        self._before = pygame.surfarray.array3d(before)
+        self._after = pygame.surfarray.array3d(after)
+
+        width, height = before.get_size()
+
+        if effect == 'crossfade':
+            self._diff = self._after.astype(numpy.int16) - self._before
+            self._work = numpy.empty(self._diff.shape, numpy.int16)
+        else:
+            self._order = _get_order(effect, width, height)
+
+        self._frame = numpy.empty_like(self._before)
+        # Same pixel format as the door surfaces (e.g., 16-bit)
+        self._surface = pygame.Surface((width, height), 0, before)
+
+    def get_frame(self, progress: float) -> pygame.Surface:
+        """
+        Returns the surface for a point in the transition.
+
+        The same surface object is returned every time, so it must be
+        drawn before the next call.
+
+        Arguments:
+        progress -- value from 0 (before) to 1 (after)
+        """
+        if progress >= 1:
+            self._frame[...] = self._after
+        elif progress <= 0:
+            self._frame[...] = self._before
+        elif self.effect == 'crossfade':
+            # Integer blend: before + (after - before) * alpha / 128 (7-bit
+            # alpha so that the product fits in 16 bits)
+            numpy.multiply(self._diff, int(progress * 128), out=self._work)
+            numpy.right_shift(self._work, 7, out=self._work)
+            numpy.add(self._work, self._before, out=self._work)
+            numpy.copyto(self._frame, self._work, casting='unsafe')
+        else:
+            mask = (self._order < progress)[:, :, None]
+            numpy.copyto(self._frame, self._before)
+            numpy.copyto(self._frame, self._after, where=mask)
+
+        pygame.surfarray.blit_array(self._surface, self._frame)
+
+        return self._surface
+
+
+if __name__ == '__main__':
+    print('This file should not be run directly. Run main.py instead.')